@@ -10,6 +10,9 @@ BOT_USERNAME = os.getenv("BOT_USERNAME", "")
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "Guardify")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_MS = int(os.getenv("MONGO_MAX_IDLE_MS", "60000"))
 
 PRETENDER_DB_URI = os.getenv("PRETENDER_DB_URI")
 PRETENDER_DB_NAME = os.getenv("PRETENDER_DB_NAME", "Rankings")
@@ -24,7 +27,58 @@ LOGGER_ID = int(os.getenv("LOGGER_ID", "0"))
 # for nsfw p*rn modulation
 NSFW_USE_FAST = os.getenv("NSFW_USE_FAST", "true").lower() in ("1", "true", "yes", "on")
 NSFW_THRESHOLD = float(os.getenv("NSFW_THRESHOLD", "0.7"))
+# pytorch, onnx or onnx-int8; the onnx models come from `python -m utils.nsfw_model export`
+# and need the packages in requirements-onnx.txt.
+# pytorch stays the default until `python -m utils.nsfw_model bench` on labelled traffic shows
+# the onnx paths keep its accuracy
+NSFW_BACKEND = os.getenv("NSFW_BACKEND", "pytorch").lower()
+NSFW_ONNX_DIR = os.getenv("NSFW_ONNX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "nsfw_onnx"))
+# micro-batching: max images per forward pass and how long the first one waits for company
+NSFW_BATCH_SIZE = int(os.getenv("NSFW_BATCH_SIZE", "8"))
+NSFW_BATCH_LATENCY_MS = float(os.getenv("NSFW_BATCH_LATENCY_MS", "25"))
+# model worker processes (0 = run the model in-process on one thread)
+NSFW_WORKERS = int(os.getenv("NSFW_WORKERS", "0"))
+NSFW_HEALTH_INTERVAL = float(os.getenv("NSFW_HEALTH_INTERVAL", "60"))
+# verdict cache: reposted media is judged by file_unique_id, then by image hash (max differing bits, 0-7)
+NSFW_HASH_DISTANCE = int(os.getenv("NSFW_HASH_DISTANCE", "4"))
+NSFW_VERDICT_CACHE_SIZE = int(os.getenv("NSFW_VERDICT_CACHE_SIZE", "50000"))
+NSFW_VERDICT_TTL = int(os.getenv("NSFW_VERDICT_TTL", "86400"))
+# frames sampled per video/GIF and their square side in pixels
+NSFW_VIDEO_FRAMES = int(os.getenv("NSFW_VIDEO_FRAMES", "6"))
+NSFW_FRAME_SIZE = int(os.getenv("NSFW_FRAME_SIZE", "224"))
+# thumbnail triage: nsfw score below LOW is clean, at/above HIGH is nsfw, anything between gets the full file
+NSFW_TRIAGE_LOW = float(os.getenv("NSFW_TRIAGE_LOW", "0.15"))
+NSFW_TRIAGE_HIGH = float(os.getenv("NSFW_TRIAGE_HIGH", "0.9"))
+# the model loads in the background after startup; until then media is let through (skip)
+# or held for up to NSFW_WARMUP_TIMEOUT seconds (queue)
+NSFW_WARMUP_POLICY = os.getenv("NSFW_WARMUP_POLICY", "skip").lower()
+NSFW_WARMUP_TIMEOUT = float(os.getenv("NSFW_WARMUP_TIMEOUT", "60"))
+
+# ffmpeg jobs allowed at once and per-job timeout (seconds)
+FFMPEG_CONCURRENCY = int(os.getenv("FFMPEG_CONCURRENCY", "2"))
+FFMPEG_TIMEOUT = float(os.getenv("FFMPEG_TIMEOUT", "30"))
+# downloads up to this many bytes stay in memory, bigger ones spill to a temp file
+MEDIA_MEMORY_LIMIT = int(os.getenv("MEDIA_MEMORY_LIMIT", str(10 * 1024 * 1024)))
+# deletions due within this many ms of each other go out as one delete_messages call per chat
+DELETE_COALESCE_MS = float(os.getenv("DELETE_COALESCE_MS", "500"))
+# most keys (chats or chat/user pairs) each rate limiter tracks before dropping the least recent
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# the bot's own rights per chat follow my_chat_member updates; this re-check only catches missed ones
+BOT_PERMS_TTL = int(os.getenv("BOT_PERMS_TTL", "3600"))
+# seconds a failed lookup of those rights is remembered before Telegram is asked again
+BOT_PERMS_RETRY = int(os.getenv("BOT_PERMS_RETRY", "60"))
+# seconds a failed admin-list fill is remembered; admin checks ask per user meanwhile
+ADMIN_ROSTER_RETRY = int(os.getenv("ADMIN_ROSTER_RETRY", "60"))
 
 # default lang & caching timers
 DEFAULT_LANG = os.getenv("DEFAULT_LANG", "en")
 CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "10000"))
+# seconds between sweeps of expired cache entries (cooldowns, rate limits, ...), 0 disables
+CACHE_SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", "300"))
+
+# per-chat slang lists
+SLANG_MATCHER_CACHE_SIZE = int(os.getenv("SLANG_MATCHER_CACHE_SIZE", "256"))
+SLANG_MAX_CUSTOM_WORDS = int(os.getenv("SLANG_MAX_CUSTOM_WORDS", "500"))
+# seconds between slang_words.txt mtime checks, 0 disables the watcher
+SLANG_WATCH_INTERVAL = float(os.getenv("SLANG_WATCH_INTERVAL", "30"))
@@ -2,12 +2,19 @@ import asyncio
 import importlib
 import logging
 import os
+import sys
+import time
 from pyrogram import idle, Client
 from pyrogram.enums import ParseMode
-from config import API_ID, API_HASH, BOT_TOKEN, BOT_USERNAME, LOGGER_ID
-from utils.database import Database
-from utils.cache import init_cache
+from config import API_ID, API_HASH, BOT_TOKEN, BOT_USERNAME, LOGGER_ID, SLANG_WATCH_INTERVAL, CACHE_SWEEP_INTERVAL
+from utils.database import Database, close_motor_clients
+from utils.cache import init_cache, sweep_expired
 from utils.logger import setup_logger
+from utils.lazy import lazy_stats
+from utils.scheduler import deletions
+from utils.bot_perms import set_bot_user
+
+_boot_started = time.perf_counter()
 
 setup_logger()
 logger = logging.getLogger(__name__)
@@ -26,6 +33,25 @@ async def _send_startup_message(client):
     except Exception as e:
         logger.exception("Failed to send startup message to logger id: %s", e)
 
+async def _warm_up_nsfw():
+    # anything going wrong here leaves media unchecked, it must not take the bot down with it
+    try:
+        from plugins.nsfw import warm_up_nsfw_model
+        await warm_up_nsfw_model()
+    except Exception as e:
+        logger.exception("NSFW model warm-up failed, NSFW checks disabled: %s", e)
+
+async def _cancel(task):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.debug("background task ended with %s", e)
+
 def _iter_plugin_modules(root: str):
     root_path = os.path.abspath(root)
     if not os.path.isdir(root_path):
@@ -47,18 +73,40 @@ def _iter_plugin_modules(root: str):
             mod_name = fname[:-3]
             yield f"{pkg_prefix}.{mod_name}"
 
+def _top_level(names):
+    return sorted({name.split(".", 1)[0] for name in names} - {PLUGINS_ROOT, "utils", "config"})
+
 def import_plugins_and_log(root: str = PLUGINS_ROOT):
+    """Import every plugin, logging what each one cost: wall time and the modules it pulled in."""
     logger.info("Scanning plugins in '%s'...", root)
     mods = list(_iter_plugin_modules(root))
     if not mods:
         logger.warning("No plugin modules found in '%s'.", root)
         return
+    costs = []
+    started = time.perf_counter()
     for module in sorted(mods):
+        before = set(sys.modules)
+        t0 = time.perf_counter()
         try:
             importlib.import_module(module)
-            logger.info("Loaded plugin: %s", module)
         except Exception as e:
             logger.exception("Failed to import plugin %s: %s", module, e)
+            continue
+        elapsed = (time.perf_counter() - t0) * 1000
+        pulled = set(sys.modules) - before
+        costs.append((elapsed, module))
+        deps = _top_level(pulled)
+        logger.info(
+            "Loaded plugin: %s (%.0f ms, +%d modules%s)",
+            module, elapsed, len(pulled), f": {', '.join(deps)}" if deps else "",
+        )
+    slowest = ", ".join(f"{m} {ms:.0f} ms" for ms, m in sorted(costs, reverse=True)[:3])
+    deferred = [name for name, ms in lazy_stats().items() if ms is None]
+    logger.info(
+        "Imported %d plugin(s) in %.0f ms; slowest: %s; deferred until first use: %s",
+        len(costs), (time.perf_counter() - started) * 1000, slowest or "-", ", ".join(deferred) or "-",
+    )
 
 async def main():
     global db, cache, app
@@ -71,6 +119,12 @@ async def main():
         logger.exception("Failed to connect to database: %s", e)
         return
 
+    try:
+        await db.migrate_chat_configs()
+    except Exception as e:
+        logger.exception("Failed to migrate chat settings: %s", e)
+        # legacy collections stay authoritative for the setters, keep going
+
     try:
         cache = await init_cache(db)
         logger.info("Cache initialized")
@@ -81,6 +135,9 @@ async def main():
     # import plugins explicitly and log each
     import_plugins_and_log(PLUGINS_ROOT)
 
+    slang_watch = None
+    nsfw_warmup = None
+    cache_sweep = None
     app = Client(
         "guard_x",
         api_id=API_ID,
@@ -93,19 +150,33 @@ async def main():
     try:
         await app.start()
         bot_info = await app.get_me()
-        logger.info("Bot started successfully: @%s (id=%s)", getattr(bot_info, "username", ""), getattr(bot_info, "id", "unknown"))
+        set_bot_user(bot_info)
+        logger.info("Bot started successfully: @%s (id=%s) in %.1fs", getattr(bot_info, "username", ""), getattr(bot_info, "id", "unknown"), time.perf_counter() - _boot_started)
+        # the model loads while the bot already answers; media is handled per NSFW_WARMUP_POLICY meanwhile
+        nsfw_warmup = asyncio.create_task(_warm_up_nsfw())
+        try:
+            await deletions.start(app)
+        except Exception as e:
+            logger.exception("Failed to start deletion scheduler: %s", e)
         await _send_startup_message(app)
+        if SLANG_WATCH_INTERVAL > 0:
+            from utils.slang import watch_slang_file
+            slang_watch = asyncio.create_task(watch_slang_file(SLANG_WATCH_INTERVAL))
+        if CACHE_SWEEP_INTERVAL > 0:
+            cache_sweep = asyncio.create_task(sweep_expired(CACHE_SWEEP_INTERVAL))
         await idle()
     except Exception as e:
         logger.exception("Error starting bot: %s", e)
     finally:
+        for task in (slang_watch, nsfw_warmup, cache_sweep):
+            await _cancel(task)
+        await deletions.stop()
         try:
             await app.stop()
         except Exception:
             pass
         try:
-            if db and getattr(db, "client", None):
-                db.client.close()
+            close_motor_clients()
         except Exception:
             pass
         logger.info("Bot stopped")
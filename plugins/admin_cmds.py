@@ -1,17 +1,16 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, LinkPreviewOptions
-from pyrogram.enums import ChatMembersFilter
-import asyncio
 from utils.decorators import admin_only, creator_only
-from utils.helpers import get_lang
+from utils.helpers import get_lang, get_group_lang
 from utils.database import Database
-from utils.cache import CacheManager, get_cache
+from utils.cache import cache
+from utils.chat_config import apply_chat_config
+from utils.admin_cache import get_admin_roster
 from config import SUDO_USERS
 import logging
 import datetime
 
 db = Database()
-_cache_fallback = CacheManager()
 logger = logging.getLogger(__name__)
 
 def _is_sudo(uid: int) -> bool:
@@ -32,38 +31,17 @@ async def _send(message: Message, text: str, reply_markup=None):
         pass
     await message.reply_text(text, reply_markup=reply_markup)
 
-def _get_cache():
-    try:
-        return get_cache()
-    except Exception:
-        return _cache_fallback
-
 @Client.on_message(filters.command("reload") & filters.group)
 @admin_only
 async def reload_admins(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     try:
-        cache = _get_cache()
-        try:
-            await asyncio.to_thread(cache.clear_admins, message.chat.id)
-        except TypeError:
-            maybe = cache.clear_admins(message.chat.id)
-            if asyncio.iscoroutine(maybe):
-                await maybe
-
-        admins = []
-        async for member in client.get_chat_members(message.chat.id, filter=ChatMembersFilter.ADMINISTRATORS):
-            try:
-                admins.append(member.user.id)
-            except Exception:
-                pass
+        cache.invalidate_chat(message.chat.id)
 
-        try:
-            await asyncio.to_thread(cache.set_admins, message.chat.id, admins)
-        except TypeError:
-            maybe = cache.set_admins(message.chat.id, admins)
-            if asyncio.iscoroutine(maybe):
-                await maybe
+        roster = await get_admin_roster(client, message.chat.id, refresh=True)
+        if roster is None:
+            raise RuntimeError("could not fetch admin list")
+        admins = roster["admins"]
 
         try:
             await db.set_group_admins(message.chat.id, admins)
@@ -78,7 +56,7 @@ async def reload_admins(client: Client, message: Message):
 @Client.on_message(filters.command("autoclean") & filters.group)
 @admin_only
 async def toggle_autoclean(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
 
     if len(message.command) < 2:
         await _send(message, get_lang("autoclean_usage", lang))
@@ -87,24 +65,13 @@ async def toggle_autoclean(client: Client, message: Message):
     status = message.command[1].lower()
 
     try:
-        cache = _get_cache()
         if status == "on":
             await db.set_auto_clean(message.chat.id, True)
-            try:
-                await asyncio.to_thread(cache.set_setting, message.chat.id, "auto_clean", True)
-            except TypeError:
-                maybe = cache.set_setting(message.chat.id, "auto_clean", True)
-                if asyncio.iscoroutine(maybe):
-                    await maybe
+            apply_chat_config(message.chat.id, auto_clean=True)
             await _send(message, get_lang("autoclean_enabled", lang))
         elif status == "off":
             await db.set_auto_clean(message.chat.id, False)
-            try:
-                await asyncio.to_thread(cache.set_setting, message.chat.id, "auto_clean", False)
-            except TypeError:
-                maybe = cache.set_setting(message.chat.id, "auto_clean", False)
-                if asyncio.iscoroutine(maybe):
-                    await maybe
+            apply_chat_config(message.chat.id, auto_clean=False)
             await _send(message, get_lang("autoclean_disabled", lang))
         else:
             await _send(message, get_lang("autoclean_usage", lang))
@@ -137,7 +104,7 @@ async def show_stats(client: Client, message: Message):
 @Client.on_message(filters.command("dev"))
 async def developer_info(client: Client, message: Message):
     try:
-        lang = await db.get_group_language(message.chat.id)
+        lang = await get_group_lang(message.chat.id)
     except Exception:
         lang = "en"
 
@@ -150,7 +117,7 @@ async def developer_info(client: Client, message: Message):
 @Client.on_message(filters.command("logadmin") & filters.group)
 @creator_only
 async def log_admin_activity(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
 
     try:
         logs = await db.get_admin_logs(message.chat.id, limit=20)
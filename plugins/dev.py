@@ -5,17 +5,16 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 
 from utils.decorators import sudo_only, owner_only
-from utils.helpers import get_lang
-from utils.database import Database
+from utils.helpers import get_lang, get_user_lang
+from utils.slang import reload_slang_words
 from config import LOGGER_ID, BOT_USERNAME
 
-db = Database()
 
 @Client.on_message(filters.command("restart") & filters.private)
 @sudo_only
 async def restart_cmd(client: Client, message: Message):
     """Restart the bot process (sudo only)."""
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_user_lang(message.from_user.id)
 
     await message.reply_text(get_lang("admin_restart_reply", lang))
 
@@ -44,11 +43,26 @@ async def restart_cmd(client: Client, message: Message):
     os.execv(sys.executable, [sys.executable] + sys.argv)
 
 
+@Client.on_message(filters.command("reloadslang") & filters.private)
+@owner_only
+async def reload_slang_cmd(client: Client, message: Message):
+    """Owner-only: Reload slang_words.txt without restarting."""
+    lang = await get_user_lang(message.from_user.id)
+
+    try:
+        stats = await reload_slang_words()
+    except Exception as e:
+        await message.reply_text(get_lang("slang_reload_failed", lang, error=e))
+        return
+
+    await message.reply_text(get_lang("slang_reloaded", lang, **stats))
+
+
 @Client.on_message(filters.command("update") & filters.private)
 @owner_only
 async def update_cmd(client: Client, message: Message):
     """Owner-only: Pull latest from git and restart."""
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_user_lang(message.from_user.id)
 
     args = message.text.split(maxsplit=1)
     commit_msg = args[1] if len(args) > 1 else None
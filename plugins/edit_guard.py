@@ -1,83 +1,32 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-import asyncio
 import logging
-import time
 
 from utils.decorators import admin_only
-from utils.helpers import get_lang, is_admin
+from utils.helpers import get_lang, is_admin, get_group_lang
 from utils.database import Database
-from utils.cache import CacheManager
+from utils.cache import cache
+from utils.chat_config import get_chat_config, apply_chat_config
+from utils.bot_perms import get_bot_perms
+from utils.ratelimit import Cooldown, SlidingWindow
+from utils.scheduler import deletions
 from config import SUPPORT_CHAT, LOGGER_ID
 
 db = Database()
-cache = CacheManager()
 logger = logging.getLogger(__name__)
 
-_warned_users = {}
-_edit_events = {}
-_bot_perms_cache = {}
-
 WARN_COOLDOWN = 60
 RATE_WINDOW = 10
 RATE_THRESHOLD = 6
-BOT_PERMS_CACHE_TTL = 300
-
-
-async def _get_bot_perms(client: Client, chat_id: int) -> tuple[bool, bool]:
-    now = time.time()
-    cached = _bot_perms_cache.get(chat_id)
-    if cached and cached[2] > now:
-        return cached[0], cached[1]
-    try:
-        me = await client.get_me()
-        bot_member = await client.get_chat_member(chat_id, me.id)
-        status = getattr(bot_member, "status", "").lower()
-        can_send = True
-        can_delete = True
-        if status in ("kicked", "left", ""):
-            can_send = False
-            can_delete = False
-        else:
-            if hasattr(bot_member, "can_send_messages"):
-                can_send = bool(bot_member.can_send_messages)
-            if hasattr(bot_member, "can_delete_messages"):
-                can_delete = bool(bot_member.can_delete_messages)
-        _bot_perms_cache[chat_id] = (can_send, can_delete, now + BOT_PERMS_CACHE_TTL)
-        return can_send, can_delete
-    except Exception:
-        _bot_perms_cache[chat_id] = (False, False, now + BOT_PERMS_CACHE_TTL)
-        return False, False
-
-
-def _record_edit_event(chat_id: int) -> int:
-    now = time.time()
-    events = _edit_events.setdefault(chat_id, [])
-    events.append(now)
-    cutoff = now - RATE_WINDOW
-    while events and events[0] < cutoff:
-        events.pop(0)
-    return len(events)
 
-
-def _was_warned_recently(chat_id: int, user_id: int) -> bool:
-    ts = _warned_users.get((chat_id, user_id))
-    if not ts:
-        return False
-    if time.time() - ts < WARN_COOLDOWN:
-        return True
-    _warned_users.pop((chat_id, user_id), None)
-    return False
-
-
-def _mark_warned(chat_id: int, user_id: int) -> None:
-    _warned_users[(chat_id, user_id)] = time.time()
+_warned = Cooldown("edit_warned", WARN_COOLDOWN)
+_events = SlidingWindow("edit_events", RATE_WINDOW)
 
 
 @Client.on_message(filters.command("edelay") & filters.group)
 @admin_only
 async def set_edit_delay(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     try:
         if len(message.command) < 2:
             await message.reply_text(get_lang("edelay_usage", lang))
@@ -87,7 +36,7 @@ async def set_edit_delay(client: Client, message: Message):
             await message.reply_text(get_lang("invalid_delay", lang))
             return
         await db.set_edit_delay(message.chat.id, delay)
-        cache.set_setting(message.chat.id, "edit_delay", delay)
+        apply_chat_config(message.chat.id, edit_delay=delay, edit_enabled=True)
         if LOGGER_ID:
             try:
                 admin_name = message.from_user.first_name or str(message.from_user.id)
@@ -115,14 +64,10 @@ async def handle_edited_message(client: Client, message: Message):
         user = message.from_user
         if not user:
             return
-        delay = cache.get_setting(chat_id, "edit_delay")
-        if delay is None:
-            delay = await db.get_edit_delay(chat_id)
-            if delay is not None:
-                cache.set_setting(chat_id, "edit_delay", delay)
+        delay = (await get_chat_config(chat_id)).active_edit_delay
         if not delay:
             return
-        can_send, can_delete = await _get_bot_perms(client, chat_id)
+        can_send, can_delete = await get_bot_perms(client, chat_id)
         if not can_send:
             return
         user_is_admin = await is_admin(client, chat_id, user.id)
@@ -133,12 +78,12 @@ async def handle_edited_message(client: Client, message: Message):
                 cache.set_auth(chat_id, user.id, "edit", is_auth)
             if is_auth:
                 return
-        recent = _record_edit_event(chat_id)
+        recent = _events.hit(chat_id)
         if recent > RATE_THRESHOLD:
             return
-        if _was_warned_recently(chat_id, user.id):
+        if _warned.active((chat_id, user.id)):
             return
-        lang = await db.get_group_language(chat_id)
+        lang = await get_group_lang(chat_id)
         username = f"@{user.username}" if user.username else user.first_name
         warning_text = get_lang("edit_warning", lang, user=username, delay=delay)
         keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("🚨 ʀᴇᴘᴏʀᴛ sᴘᴀᴍ ?", url=SUPPORT_CHAT)]])
@@ -149,36 +94,16 @@ async def handle_edited_message(client: Client, message: Message):
                 warning_msg = await client.send_message(chat_id, warning_text, reply_markup=keyboard)
             except Exception:
                 return
-        _mark_warned(chat_id, user.id)
-
-        async def _delayed_delete(msg, warn, chat, uid, del_ok, mins):
-            await asyncio.sleep(mins * 60)
-            try:
-                if await is_admin(client, chat, uid):
-                    is_auth = cache.get_auth(chat, uid, "edit")
-                    if is_auth is None:
-                        is_auth = await db.is_edit_authorized(chat, uid)
-                        cache.set_auth(chat, uid, "edit", is_auth)
-                    if is_auth:
-                        if warn and del_ok:
-                            try:
-                                await warn.delete()
-                            except:
-                                pass
-                        return
-                if del_ok:
-                    try:
-                        await msg.delete()
-                    except:
-                        pass
-                try:
-                    await warn.delete()
-                except:
-                    pass
-            except Exception:
-                pass
+        _warned.mark((chat_id, user.id))
 
-        asyncio.create_task(_delayed_delete(message, warning_msg, chat_id, user.id, can_delete, int(delay)))
+        await deletions.schedule(
+            chat_id,
+            message_ids=(message.id,) if can_delete else (),
+            warning_ids=(warning_msg.id,),
+            delay=int(delay) * 60,
+            user_id=user.id,
+            auth_type="edit",
+        )
 
     except Exception:
         pass
@@ -187,7 +112,7 @@ async def handle_edited_message(client: Client, message: Message):
 @Client.on_message(filters.command(["auth", "eauth"]) & filters.group)
 @admin_only
 async def edit_auth(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     if message.reply_to_message and message.reply_to_message.from_user:
         user_id = message.reply_to_message.from_user.id
     elif len(message.command) > 1:
@@ -211,7 +136,7 @@ async def edit_auth(client: Client, message: Message):
 @Client.on_message(filters.command(["unauth", "eunauth"]) & filters.group)
 @admin_only
 async def edit_unauth(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     if message.reply_to_message and message.reply_to_message.from_user:
         user_id = message.reply_to_message.from_user.id
     elif len(message.command) > 1:
@@ -230,7 +155,7 @@ async def edit_unauth(client: Client, message: Message):
 
 @Client.on_message(filters.command(["authlist", "eauthlist"]) & filters.group)
 async def edit_auth_list(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     users = await db.get_edit_auth_list(message.chat.id)
     if not users:
         await message.reply_text(get_lang("no_auth_users", lang))
@@ -1,19 +1,37 @@
 from pyrogram import Client, filters
 from pyrogram.types import ChatMemberUpdated, Message
 from utils.database import Database
-from utils.cache import CacheManager
+from utils.cache import cache
+from utils.admin_cache import apply_member_update, invalidate_admin_roster
+from utils.bot_perms import apply_bot_update, bot_id
+from utils.chat_config import invalidate_chat_config
+from utils.slang import invalidate_chat_matcher
+from utils.decorators import _normalize_status
 from config import LOGGER_ID
 import logging
 
 db = Database()
-cache = CacheManager()
 logger = logging.getLogger(__name__)
 
 @Client.on_chat_member_updated()
 async def track_bot_status(client: Client, update: ChatMemberUpdated):
     try:
-        if update.new_chat_member and update.new_chat_member.user.id == (await client.get_me()).id:
-            if update.new_chat_member.status in ["member", "administrator"]:
+        # keep the cached admin roster in step with promotions/demotions
+        changed = update.new_chat_member or update.old_chat_member
+        if changed and getattr(changed, "user", None):
+            apply_member_update(
+                update.chat.id,
+                changed.user.id,
+                getattr(update.old_chat_member, "status", None),
+                getattr(update.new_chat_member, "status", None),
+            )
+
+        if update.new_chat_member and update.new_chat_member.user.id == await bot_id(client):
+            # the bot's own rights change here first; no need to poll get_chat_member for them
+            apply_bot_update(update.chat.id, update.new_chat_member)
+            # pyrogram hands over ChatMemberStatus enums, which never equal the plain strings
+            status = _normalize_status(update.new_chat_member.status)
+            if status in ("member", "administrator"):
                 await db.add_active_group(update.chat.id, update.chat.title)
                 
                 if LOGGER_ID and update.from_user:
@@ -25,8 +43,13 @@ async def track_bot_status(client: Client, update: ChatMemberUpdated):
                     log_msg += f"🆔 Group ID: `{update.chat.id}`"
                     await client.send_message(LOGGER_ID, log_msg)
             
-            elif update.new_chat_member.status in ["left", "kicked"]:
+            elif status in ("left", "kicked", "banned"):
                 await db.remove_active_group(update.chat.id)
+                # nothing reads this chat's state until the bot is back, and by then it may be stale
+                invalidate_chat_config(update.chat.id)
+                # member updates are not delivered while the bot is out, so the roster cannot be kept
+                invalidate_admin_roster(update.chat.id)
+                invalidate_chat_matcher(update.chat.id)
                 
                 if LOGGER_ID and update.from_user:
                     removed_by = update.from_user.first_name
@@ -6,9 +6,7 @@ from pyrogram.types import (
     InlineKeyboardButton,
     LinkPreviewOptions
 )
-import asyncio
-from utils.helpers import get_lang
-from utils.cache import get_cache
+from utils.helpers import get_lang, get_user_lang, get_group_lang
 
 def get_help_keyboard():
     return InlineKeyboardMarkup([
@@ -29,13 +27,10 @@ def get_help_keyboard():
 
 @Client.on_message(filters.command("help"))
 async def help_command(client: Client, message: Message):
-    cache = get_cache() if get_cache else None
-
     if message.chat.type in ("group", "supergroup"):
-        lang = await asyncio.to_thread(lambda: cache.get_setting(message.chat.id, "language")) if cache else None
+        lang = await get_group_lang(message.chat.id)
     else:
-        lang = await asyncio.to_thread(lambda: cache.get_setting(message.from_user.id, "language")) if cache else None
-    lang = lang or "en"
+        lang = await get_user_lang(message.from_user.id)
 
     txt = get_lang("help_main", lang)
 
@@ -47,13 +42,10 @@ async def help_command(client: Client, message: Message):
 
 @Client.on_callback_query(filters.regex("^help_"))
 async def help_callback(client: Client, callback: CallbackQuery):
-    cache = get_cache() if get_cache else None
-
     if callback.message and callback.message.chat.type in ("group", "supergroup"):
-        lang = await asyncio.to_thread(lambda: cache.get_setting(callback.message.chat.id, "language")) if cache else None
+        lang = await get_group_lang(callback.message.chat.id)
     else:
-        lang = await asyncio.to_thread(lambda: cache.get_setting(callback.from_user.id, "language")) if cache else None
-    lang = lang or "en"
+        lang = await get_user_lang(callback.from_user.id)
 
     d = callback.data
 
@@ -1,83 +1,32 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-import asyncio
 import logging
-import time
 
 from utils.decorators import admin_only
-from utils.helpers import get_lang, is_admin
+from utils.helpers import get_lang, get_group_lang
 from utils.database import Database
-from utils.cache import CacheManager
+from utils.cache import cache
+from utils.chat_config import get_chat_config, apply_chat_config
+from utils.ratelimit import Cooldown, SlidingWindow
+from utils.moderation import guard, MEDIA_KINDS
+from utils.scheduler import deletions
 from config import SUPPORT_CHAT, LOGGER_ID
 
 db = Database()
-cache = CacheManager()
 logger = logging.getLogger(__name__)
 
-_warned_users = {}
-_edit_events = {}
-_bot_perms_cache = {}
-
 WARN_COOLDOWN = 60
 RATE_WINDOW = 10
 RATE_THRESHOLD = 6
-BOT_PERMS_CACHE_TTL = 300
-
-
-async def _get_bot_perms(client: Client, chat_id: int) -> tuple[bool, bool]:
-    now = time.time()
-    cached = _bot_perms_cache.get(chat_id)
-    if cached and cached[2] > now:
-        return cached[0], cached[1]
-    try:
-        me = await client.get_me()
-        bot_member = await client.get_chat_member(chat_id, me.id)
-        status = getattr(bot_member, "status", "").lower()
-        can_send = True
-        can_delete = True
-        if status in ("kicked", "left", ""):
-            can_send = False
-            can_delete = False
-        else:
-            if hasattr(bot_member, "can_send_messages"):
-                can_send = bool(bot_member.can_send_messages)
-            if hasattr(bot_member, "can_delete_messages"):
-                can_delete = bool(bot_member.can_delete_messages)
-        _bot_perms_cache[chat_id] = (can_send, can_delete, now + BOT_PERMS_CACHE_TTL)
-        return can_send, can_delete
-    except Exception:
-        _bot_perms_cache[chat_id] = (False, False, now + BOT_PERMS_CACHE_TTL)
-        return False, False
-
-
-def _record_media_event(chat_id: int) -> int:
-    now = time.time()
-    events = _edit_events.setdefault(chat_id, [])
-    events.append(now)
-    cutoff = now - RATE_WINDOW
-    while events and events[0] < cutoff:
-        events.pop(0)
-    return len(events)
 
-
-def _was_warned_recently(chat_id: int, user_id: int) -> bool:
-    ts = _warned_users.get((chat_id, user_id))
-    if not ts:
-        return False
-    if time.time() - ts < WARN_COOLDOWN:
-        return True
-    _warned_users.pop((chat_id, user_id), None)
-    return False
-
-
-def _mark_warned(chat_id: int, user_id: int) -> None:
-    _warned_users[(chat_id, user_id)] = time.time()
+_warned = Cooldown("media_warned", WARN_COOLDOWN)
+_events = SlidingWindow("media_events", RATE_WINDOW)
 
 
 @Client.on_message(filters.command("setdelay") & filters.group)
 @admin_only
 async def set_media_delay(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     try:
         if len(message.command) < 2:
             await message.reply_text(get_lang("setdelay_usage", lang))
@@ -87,7 +36,7 @@ async def set_media_delay(client: Client, message: Message):
             await message.reply_text(get_lang("invalid_delay", lang))
             return
         await db.set_media_delay(message.chat.id, delay)
-        cache.set_setting(message.chat.id, "media_delay", delay)
+        apply_chat_config(message.chat.id, media_delay=delay, media_enabled=True)
         if LOGGER_ID:
             try:
                 admin_name = message.from_user.first_name or str(message.from_user.id)
@@ -110,68 +59,36 @@ async def set_media_delay(client: Client, message: Message):
 
 @Client.on_message(filters.command("getdelay") & filters.group)
 async def get_media_delay(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
-    delay = cache.get_setting(message.chat.id, "media_delay")
-    if delay is None:
-        delay = await db.get_media_delay(message.chat.id)
-        if delay is not None:
-            cache.set_setting(message.chat.id, "media_delay", delay)
+    lang = await get_group_lang(message.chat.id)
+    delay = (await get_chat_config(message.chat.id)).active_media_delay
     if delay:
         await message.reply_text(get_lang("getdelay_enabled", lang, delay=delay))
     else:
         await message.reply_text(get_lang("getdelay_disabled", lang))
 
 
-@Client.on_message(
-    filters.group &
-    (filters.photo | filters.video | filters.animation | filters.sticker | filters.document)
-)
-async def handle_media(client: Client, message: Message):
+# ahead of nsfw (order 20): the delay warning is cheap and must not wait on a download and inference
+@guard("media_delay", order=15, kinds=MEDIA_KINDS, enabled=lambda cfg: bool(cfg.active_media_delay))
+async def handle_media(ctx) -> bool:
+    client, message, user = ctx.client, ctx.message, ctx.user
     try:
-        user = message.from_user
-        if not user:
-            return
+        delay = ctx.config.active_media_delay
 
-        is_gbanned = cache.get_gban(user.id)
-        if is_gbanned is None:
-            is_gbanned = await db.is_gbanned(user.id)
-            cache.set_gban(user.id, is_gbanned)
-        if is_gbanned:
-            try:
-                await message.delete()
-            except Exception:
-                pass
-            return
-
-        delay = cache.get_setting(message.chat.id, "media_delay")
-        if delay is None:
-            delay = await db.get_media_delay(message.chat.id)
-            if delay is not None:
-                cache.set_setting(message.chat.id, "media_delay", delay)
-        if not delay:
-            return
-
-        can_send, can_delete = await _get_bot_perms(client, message.chat.id)
+        can_send, can_delete = await ctx.bot_perms()
         if not can_send:
-            return
+            return False
 
-        user_is_admin = await is_admin(client, message.chat.id, user.id)
-        if user_is_admin:
-            is_auth = cache.get_auth(message.chat.id, user.id, "media")
-            if is_auth is None:
-                is_auth = await db.is_media_authorized(message.chat.id, user.id)
-                cache.set_auth(message.chat.id, user.id, "media", is_auth)
-            if is_auth:
-                return
+        if await ctx.is_exempt("media"):
+            return False
 
-        recent = _record_media_event(message.chat.id)
+        recent = _events.hit(message.chat.id)
         if recent > RATE_THRESHOLD:
-            return
+            return False
 
-        if _was_warned_recently(message.chat.id, user.id):
-            return
+        if _warned.active((message.chat.id, user.id)):
+            return False
 
-        lang = await db.get_group_language(message.chat.id)
+        lang = ctx.lang
         username = f"@{user.username}" if getattr(user, "username", None) else (user.first_name or str(user.id))
         warning_text = get_lang("media_warning", lang, user=username, delay=delay)
         keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("🚨 ʀᴇᴘᴏʀᴛ sᴘᴀᴍ", url=SUPPORT_CHAT)]])
@@ -182,47 +99,29 @@ async def handle_media(client: Client, message: Message):
             try:
                 warning_msg = await client.send_message(message.chat.id, warning_text, reply_markup=keyboard)
             except Exception:
-                return
-
-        _mark_warned(message.chat.id, user.id)
+                return False
 
-        async def _del_after_delay(msg: Message, warn_msg: Message, chat: int, uid: int, can_del: bool, mins: int):
-            await asyncio.sleep(mins * 60)
-            try:
-                if await is_admin(client, chat, uid):
-                    is_auth2 = cache.get_auth(chat, uid, "media")
-                    if is_auth2 is None:
-                        is_auth2 = await db.is_media_authorized(chat, uid)
-                        cache.set_auth(chat, uid, "media", is_auth2)
-                    if is_auth2:
-                        if warn_msg and can_del:
-                            try:
-                                await warn_msg.delete()
-                            except Exception:
-                                pass
-                        return
-                if can_del:
-                    try:
-                        await msg.delete()
-                    except Exception:
-                        pass
-                try:
-                    await warn_msg.delete()
-                except Exception:
-                    pass
-            except Exception:
-                pass
+        _warned.mark((message.chat.id, user.id))
 
-        asyncio.create_task(_del_after_delay(message, warning_msg, message.chat.id, user.id, can_delete, int(delay)))
+        await deletions.schedule(
+            message.chat.id,
+            message_ids=(message.id,) if can_delete else (),
+            warning_ids=(warning_msg.id,),
+            delay=int(delay) * 60,
+            user_id=user.id,
+            auth_type="media",
+        )
 
     except Exception as e:
         logger.error("Error handling media: %s", e, exc_info=True)
+    # deletion is scheduled, later guards still run on this message
+    return False
 
 
 @Client.on_message(filters.command("mauth") & filters.group)
 @admin_only
 async def media_auth(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     if message.reply_to_message and message.reply_to_message.from_user:
         user_id = message.reply_to_message.from_user.id
     elif len(message.command) > 1:
@@ -246,7 +145,7 @@ async def media_auth(client: Client, message: Message):
 @Client.on_message(filters.command("munauth") & filters.group)
 @admin_only
 async def media_unauth(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     if message.reply_to_message and message.reply_to_message.from_user:
         user_id = message.reply_to_message.from_user.id
     elif len(message.command) > 1:
@@ -265,7 +164,7 @@ async def media_unauth(client: Client, message: Message):
 
 @Client.on_message(filters.command("mauthlist") & filters.group)
 async def media_auth_list(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     auth_users = await db.get_media_auth_list(message.chat.id)
     if not auth_users:
         await message.reply_text(get_lang("no_auth_users", lang))
@@ -0,0 +1,27 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message
+import logging
+
+from utils.moderation import guard, run_pipeline, MEDIA_KINDS
+from utils.scheduler import deletions
+
+logger = logging.getLogger(__name__)
+
+# own handler group so commands in group 0 are never shadowed by (or shadow) the guards
+MODERATION_GROUP = 1
+
+
+@guard("gban", order=10, kinds=MEDIA_KINDS)
+async def gban_guard(ctx) -> bool:
+    if not await ctx.is_gbanned():
+        return False
+    deletions.delete_soon(ctx.client, ctx.chat_id, ctx.message.id)
+    return True
+
+
+@Client.on_message(filters.group & ~filters.service, group=MODERATION_GROUP)
+async def moderate(client: Client, message: Message):
+    try:
+        await run_pipeline(client, message)
+    except Exception as e:
+        logger.error("moderation pipeline error: %s", e, exc_info=True)
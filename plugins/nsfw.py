@@ -1,28 +1,30 @@
 import asyncio
 import os
-import subprocess
-import tempfile
+import time
 import logging
-from PIL import Image
 from pyrogram import Client, filters
 from pyrogram.types import Message
-from transformers import pipeline
 
-from utils.database import Database
-from utils.cache import CacheManager
-from utils.helpers import get_lang, is_admin
+from utils.helpers import get_lang, get_group_lang
 from utils.decorators import creator_only
-from config import LOGGER_ID, NSFW_USE_FAST, NSFW_THRESHOLD
+from utils.moderation import guard
+from utils.scheduler import deletions
+from utils.inference import BatchInferenceService
+from utils.worker_pool import WorkerPool
+from utils import nsfw_model
+from utils.verdict_cache import image_hash, lookup_file, lookup_hash, remember
+from utils.media_tools import sample_frames, fetch_media, discard
+from config import (
+    LOGGER_ID, NSFW_USE_FAST, NSFW_THRESHOLD, NSFW_BATCH_SIZE, NSFW_BATCH_LATENCY_MS,
+    NSFW_WORKERS, NSFW_HEALTH_INTERVAL, NSFW_VIDEO_FRAMES, NSFW_FRAME_SIZE,
+    NSFW_TRIAGE_LOW, NSFW_TRIAGE_HIGH, NSFW_WARMUP_POLICY, NSFW_WARMUP_TIMEOUT,
+)
 
-db = Database()
-cache = CacheManager()
 logger = logging.getLogger(__name__)
 
 USE_FAST_PROCESSOR = bool(NSFW_USE_FAST) if ("NSFW_USE_FAST" in globals() or 'NSFW_USE_FAST' in locals()) else True
 NSFW_THRESHOLD = float(NSFW_THRESHOLD) if ("NSFW_THRESHOLD" in globals() or 'NSFW_THRESHOLD' in locals()) else 0.7
 
-nsfw_classifier = None
-
 def _bool_from_any(v):
     if isinstance(v, bool):
         return v
@@ -31,19 +33,6 @@ def _bool_from_any(v):
     s = str(v).lower()
     return s in ("1", "true", "yes", "on", "fast")
 
-def load_nsfw_model(use_fast=None):
-    global nsfw_classifier, USE_FAST_PROCESSOR
-    if use_fast is not None:
-        USE_FAST_PROCESSOR = bool(use_fast)
-    try:
-        nsfw_classifier = pipeline(
-            "image-classification",
-            model="Falconsai/nsfw_image_detection",
-            use_fast=USE_FAST_PROCESSOR
-        )
-    except Exception:
-        nsfw_classifier = None
-
 _env_use_fast = os.getenv("NSFW_USE_FAST", None)
 if _env_use_fast is not None:
     try:
@@ -51,60 +40,197 @@ if _env_use_fast is not None:
     except:
         pass
 
-load_nsfw_model()
+# nothing heavy happens at import: the workers are spawned and the model loaded by
+# warm_up_nsfw_model(), which main schedules once the client is connected
+nsfw_pool = WorkerPool(
+    NSFW_WORKERS,
+    nsfw_model.worker_init,
+    ping=nsfw_model.worker_ping,
+    name="nsfw",
+    health_interval=NSFW_HEALTH_INTERVAL,
+) if NSFW_WORKERS > 0 else None
+
+_model_loaded = asyncio.Event()
+_load_lock = asyncio.Lock()
+
+async def warm_up_nsfw_model(use_fast=None):
+    """(Re)load the model off the event loop; returns whether it is usable afterwards."""
+    global USE_FAST_PROCESSOR
+    async with _load_lock:
+        if use_fast is not None:
+            USE_FAST_PROCESSOR = bool(use_fast)
+        started = time.perf_counter()
+        if nsfw_pool is None:
+            # the old classifier keeps serving until the new one replaces it
+            ready = await asyncio.to_thread(nsfw_model.load, USE_FAST_PROCESSOR) is not None
+        else:
+            _model_loaded.clear()
+            # split the cores between workers instead of letting every torch instance grab all of them
+            nsfw_pool.restart((USE_FAST_PROCESSOR, max(1, (os.cpu_count() or 1) // NSFW_WORKERS)))
+            ready = await nsfw_pool.wait_ready() > 0
+        if ready:
+            _model_loaded.set()
+            logger.info("nsfw model ready in %.1fs", time.perf_counter() - started)
+        else:
+            _model_loaded.clear()
+            logger.error("nsfw model failed to load; media goes unchecked")
+        return ready
+
+# images travel to the workers as file paths or raw frames; decoding happens next to the model
+nsfw_service = BatchInferenceService(
+    nsfw_model.classify_batch,
+    NSFW_BATCH_SIZE,
+    NSFW_BATCH_LATENCY_MS,
+    name="nsfw",
+    runner=nsfw_pool.run if nsfw_pool is not None else None,
+    concurrency=max(1, NSFW_WORKERS),
+)
+
+def _model_ready():
+    return _model_loaded.is_set()
+
+async def _wait_for_model():
+    """Whether to go on with a full check, applying NSFW_WARMUP_POLICY while the model loads."""
+    if _model_loaded.is_set():
+        return True
+    if NSFW_WARMUP_POLICY != "queue":
+        return False
+    try:
+        await asyncio.wait_for(_model_loaded.wait(), NSFW_WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+NSFW_LABELS = ("nsfw", "porn", "hentai")
 
-def is_nsfw_content(image_path: str):
-    if not nsfw_classifier:
+# video frames per inference round; the rest of a clip is skipped once a round finds a hit
+_VIDEO_CHUNK = 2
+
+def _is_nsfw_label(label, score):
+    return label.lower() in NSFW_LABELS and score >= NSFW_THRESHOLD
+
+def _nsfw_score(results):
+    return sum(float(r.get("score", 0.0)) for r in results if r.get("label", "").lower() in NSFW_LABELS)
+
+def _verdict(results):
+    top = max(results, key=lambda x: x.get("score", 0))
+    label = top.get("label", "Unknown")
+    score = float(top.get("score", 0.0))
+    return _is_nsfw_label(label, score), score, label
+
+async def is_nsfw_content(image):
+    if not _model_ready():
         return False, 0.0, "Model"
     try:
-        image = Image.open(image_path).convert("RGB")
-        results = nsfw_classifier(image)
-        top = max(results, key=lambda x: x.get("score", 0))
-        label = top.get("label", "Unknown")
-        score = float(top.get("score", 0.0))
-        low_label = label.lower()
-        is_nsfw = low_label in ["nsfw", "porn", "hentai"] and score >= NSFW_THRESHOLD
-        return is_nsfw, score, label
+        results = await nsfw_service.infer(image)
+        if results is None:
+            return False, 0.0, "Model"
+        return _verdict(results)
     except Exception:
         return False, 0.0, "Error"
 
-def extract_video_frame(video_path: str, output_path: str, time_offset: str = "00:00:01") -> bool:
-    cmd = ["ffmpeg", "-ss", time_offset, "-i", video_path, "-vframes", "1", "-q:v", "2", "-y", output_path]
-    try:
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30)
-        return result.returncode == 0 and os.path.exists(output_path)
-    except Exception:
-        return False
+async def classify_video(video_path: str, duration=None):
+    """Sample NSFW_VIDEO_FRAMES frames, classify them _VIDEO_CHUNK at a time and stop at the first one over the threshold."""
+    if not _model_ready():
+        return False, 0.0, "Model"
+    size = NSFW_FRAME_SIZE
+    frames = await sample_frames(video_path, NSFW_VIDEO_FRAMES, duration, size)
+    if not frames:
+        return False, 0.0, "Unknown"
+    # every other frame first, so the early chunks already span the whole clip
+    frames = frames[::2] + frames[1::2]
+    best = (False, 0.0, "Unknown")
+    for start in range(0, len(frames), _VIDEO_CHUNK):
+        chunk = frames[start:start + _VIDEO_CHUNK]
+        outcomes = await asyncio.gather(
+            *(nsfw_service.infer(nsfw_model.RawFrame(size, size, f)) for f in chunk),
+            return_exceptions=True,
+        )
+        for results in outcomes:
+            if isinstance(results, Exception):
+                continue
+            if results is None:
+                return False, 0.0, "Model"
+            verdict = _verdict(results)
+            if verdict[0]:
+                return verdict
+            if best[2] == "Unknown" or (verdict[2].lower() in NSFW_LABELS and verdict[1] > best[1]):
+                best = verdict
+    return best
+
+async def _classify_cached(image, file_unique_id=None):
+    # a near-duplicate that was already judged skips inference; fresh verdicts are stored for next time
+    h = await image_hash(image)
+    hit = await lookup_hash(h)
+    if hit is not None:
+        label, confidence = hit
+        await remember(file_unique_id, None, label, confidence)
+        return _is_nsfw_label(label, confidence), confidence, label
+    is_nsfw, confidence, label = await is_nsfw_content(image)
+    if label not in ("Model", "Error"):
+        await remember(file_unique_id, h, label, confidence)
+    return is_nsfw, confidence, label
+
+async def check_cached_verdict(client: Client, message: Message, file_unique_id, media_type: str):
+    """Act on a stored verdict for this exact file; None means it has to be downloaded and checked."""
+    hit = await lookup_file(file_unique_id)
+    if hit is None:
+        return None
+    label, confidence = hit
+    return await _handle_verdict(client, message, _is_nsfw_label(label, confidence), confidence, label, media_type)
 
-def trim_video(video_path: str, output_path: str, duration: int = 10) -> bool:
-    cmd = ["ffmpeg", "-i", video_path, "-t", str(duration), "-c", "copy", "-y", output_path]
+async def triage_thumbnail(client: Client, message: Message, media, media_type: str):
+    """Judge the largest Telegram thumbnail in memory; None when it did not settle the verdict.
+
+    Only scores inside [NSFW_TRIAGE_LOW, NSFW_TRIAGE_HIGH) fall through to the full download.
+    """
+    thumbs = getattr(media, "thumbs", None)
+    if not thumbs or not _model_ready():
+        return None
+    thumb = max(thumbs, key=lambda t: (t.width or 0) * (t.height or 0))
     try:
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
-        return result.returncode == 0
-    except Exception:
-        return False
+        buf = await client.download_media(thumb.file_id, in_memory=True)
+        results = await nsfw_service.infer(buf.getvalue())
+    except Exception as e:
+        logger.debug("thumbnail triage failed: %s", e)
+        return None
+    if results is None:
+        return None
+    score = _nsfw_score(results)
+    if NSFW_TRIAGE_LOW <= score < max(NSFW_TRIAGE_HIGH, NSFW_THRESHOLD):
+        return None
+    is_nsfw, confidence, label = _verdict(results)
+    # a thumbnail can look clean while the full file is not, so only confident NSFW hits are
+    # stored; a clean triage verdict is cached in this process alone
+    await remember(media.file_unique_id, None, label, confidence, persist=is_nsfw and score >= NSFW_TRIAGE_HIGH)
+    return await _handle_verdict(client, message, is_nsfw, confidence, label, media_type)
 
-async def check_and_handle_nsfw(client: Client, message: Message, file_path: str, media_type: str):
+async def check_and_handle_nsfw(client: Client, message: Message, source, media_type: str, file_unique_id=None, duration=None):
+    # source is the downloaded bytes, or a temp file path for media too big to keep in memory
     try:
-        lang = await db.get_group_language(message.chat.id)
         is_nsfw = False
         confidence = 0.0
         label = "Unknown"
 
-        if media_type == "photo":
-            is_nsfw, confidence, label = is_nsfw_content(file_path)
-        elif media_type in ["video", "animation", "gif", "sticker"]:
-            frame_path = file_path + "_frame.jpg"
-            if extract_video_frame(file_path, frame_path):
-                is_nsfw, confidence, label = is_nsfw_content(frame_path)
-                if os.path.exists(frame_path):
-                    os.remove(frame_path)
+        if media_type in ["photo", "sticker"]:
+            is_nsfw, confidence, label = await _classify_cached(source, file_unique_id)
+        elif media_type in ["video", "animation", "gif"]:
+            is_nsfw, confidence, label = await classify_video(source, duration)
+            if label not in ("Model", "Error", "Unknown"):
+                await remember(file_unique_id, None, label, confidence)
+
+        return await _handle_verdict(client, message, is_nsfw, confidence, label, media_type)
+    except Exception:
+        return False
+    finally:
+        discard(source)
+
+async def _handle_verdict(client: Client, message: Message, is_nsfw, confidence, label, media_type: str):
+    try:
+        lang = await get_group_lang(message.chat.id)
 
         if is_nsfw:
-            try:
-                await message.delete()
-            except:
-                pass
+            deletions.delete_soon(client, message.chat.id, message.id)
 
             warning_text = get_lang(
                 "nsfw_detected",
@@ -136,35 +262,24 @@ async def check_and_handle_nsfw(client: Client, message: Message, file_path: str
                     pass
 
             if warning_msg:
-                await asyncio.sleep(30)
-                try:
-                    await warning_msg.delete()
-                except:
-                    pass
+                await deletions.schedule(message.chat.id, warning_ids=(warning_msg.id,), delay=30)
             return True
         return False
     except Exception:
         return False
-    finally:
-        for p in [file_path, file_path + "_trimmed.mp4", file_path + "_frame.jpg"]:
-            if os.path.exists(p):
-                try:
-                    os.remove(p)
-                except:
-                    pass
 
 
 @Client.on_message(filters.command("antinsfw") & filters.group)
 @creator_only
 async def nsfw_mode_command(client: Client, message: Message):
     arg = (message.text.split(maxsplit=1)[1] if len(message.command) > 1 else "").lower()
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
 
     if arg in ["fast", "true", "1", "on"]:
-        load_nsfw_model(use_fast=True)
+        await warm_up_nsfw_model(use_fast=True)
         await message.reply(get_lang("nsfw_reloaded_fast", lang))
     elif arg in ["slow", "false", "0", "off"]:
-        load_nsfw_model(use_fast=False)
+        await warm_up_nsfw_model(use_fast=False)
         await message.reply(get_lang("nsfw_reloaded_slow", lang))
     else:
         mode = "fast" if USE_FAST_PROCESSOR else "slow"
@@ -177,60 +292,55 @@ async def nsfw_mode_command(client: Client, message: Message):
         )
         await message.reply(msg)
 
-@Client.on_message(filters.group & filters.photo)
 async def check_photo_nsfw(client: Client, message: Message):
-    if await is_admin(client, message.chat.id, message.from_user.id):
-        return
-    if await db.is_gbanned(message.from_user.id):
-        await message.delete()
-        return
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-        file_path = tmp.name
-    await message.download(file_path)
-    await check_and_handle_nsfw(client, message, file_path, "photo")
-
-@Client.on_message(filters.group & (filters.video | filters.animation))
+    unique_id = message.photo.file_unique_id
+    settled = await check_cached_verdict(client, message, unique_id, "photo")
+    if settled is not None:
+        return settled
+    if not await _wait_for_model():
+        return False
+    settled = await triage_thumbnail(client, message, message.photo, "photo")
+    if settled is not None:
+        return settled
+    source = await fetch_media(message, message.photo.file_size, ".jpg")
+    return await check_and_handle_nsfw(client, message, source, "photo", unique_id)
+
 async def check_video_nsfw(client: Client, message: Message):
-    if await is_admin(client, message.chat.id, message.from_user.id):
-        return
-    if await db.is_gbanned(message.from_user.id):
-        await message.delete()
-        return
     media = message.animation or message.video
     media_type = "gif" if message.animation else "video"
     if media.file_size and media.file_size > 50 * 1024 * 1024:
-        return
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-        file_path = tmp.name
-    await message.download(file_path)
-    if getattr(media, "duration", 0) and media.duration > 10:
-        trimmed = file_path + "_trimmed.mp4"
-        if trim_video(file_path, trimmed, 10):
-            try:
-                os.remove(file_path)
-            except:
-                pass
-            file_path = trimmed
-    await check_and_handle_nsfw(client, message, file_path, media_type)
+        return False
+    settled = await check_cached_verdict(client, message, media.file_unique_id, media_type)
+    if settled is not None:
+        return settled
+    if not await _wait_for_model():
+        return False
+    settled = await triage_thumbnail(client, message, media, media_type)
+    if settled is not None:
+        return settled
+    # ffmpeg needs a seekable input, so videos always go to disk
+    source = await fetch_media(message, media.file_size, ".mp4", limit=0)
+    return await check_and_handle_nsfw(client, message, source, media_type, media.file_unique_id, getattr(media, "duration", None))
 
-@Client.on_message(filters.group & filters.sticker)
 async def check_sticker_nsfw(client: Client, message: Message):
-    if await is_admin(client, message.chat.id, message.from_user.id):
-        return
-    if await db.is_gbanned(message.from_user.id):
-        await message.delete()
-        return
     if message.sticker.is_animated or message.sticker.is_video:
-        return
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".webp") as tmp:
-        file_path = tmp.name
-    await message.download(file_path)
-    try:
-        img = Image.open(file_path)
-        jpg_path = file_path.replace(".webp", ".jpg")
-        img.convert("RGB").save(jpg_path, "JPEG")
-        os.remove(file_path)
-        file_path = jpg_path
-    except Exception:
-        pass
-    await check_and_handle_nsfw(client, message, file_path, "sticker")
+        return False
+    settled = await check_cached_verdict(client, message, message.sticker.file_unique_id, "sticker")
+    if settled is not None:
+        return settled
+    if not await _wait_for_model():
+        return False
+    # PIL reads WEBP straight from the buffer, no JPEG copy needed
+    source = await fetch_media(message, message.sticker.file_size, ".webp")
+    return await check_and_handle_nsfw(client, message, source, "sticker", message.sticker.file_unique_id)
+
+@guard("nsfw", order=20, kinds=("photo", "video", "animation", "sticker"))
+async def nsfw_guard(ctx) -> bool:
+    if await ctx.is_admin():
+        return False
+    message = ctx.message
+    if message.photo:
+        return await check_photo_nsfw(ctx.client, message)
+    if message.video or message.animation:
+        return await check_video_nsfw(ctx.client, message)
+    return await check_sticker_nsfw(ctx.client, message)
@@ -2,9 +2,9 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 from pyrogram.errors import UserIsBlocked, PeerIdInvalid
 from utils.decorators import owner_only, sudo_only
-from utils.helpers import get_lang
+from utils.helpers import get_lang, get_group_lang
 from utils.database import Database
-from utils import cache
+from utils.cache import cache
 from config import OWNER_ID, SUDO_USERS
 import asyncio
 import logging
@@ -22,7 +22,7 @@ logger = logging.getLogger(__name__)
 @sudo_only
 async def active_groups(client: Client, message: Message):
     """Show active groups with invite links"""
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
 
     try:
         groups = await db.get_active_groups()
@@ -1,61 +1,111 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from utils.decorators import admin_only
-from utils.helpers import get_lang, is_admin, load_slang_words
+from utils.helpers import get_lang, get_group_lang
 from utils.database import Database
-from utils.cache import CacheManager
-from config import SUPPORT_CHAT
+from utils.cache import cache
+from utils.chat_config import get_chat_config, apply_chat_config
+from utils.slang import get_chat_matcher
+from utils.moderation import guard
+from utils.scheduler import deletions
+from config import SUPPORT_CHAT, SLANG_MAX_CUSTOM_WORDS
 import logging
 
 db = Database()
-cache = CacheManager()
 logger = logging.getLogger(__name__)
 
-SLANG_WORDS = load_slang_words()
+
+def _parse_words(message: Message):
+    parts = message.text.split(None, 1)
+    if len(parts) < 2:
+        return []
+    raw = parts[1]
+    items = raw.split(",") if "," in raw else raw.split()
+    words = []
+    for item in items:
+        word = " ".join(item.split()).lower()
+        if word and word not in words:
+            words.append(word)
+    return words
 
 @Client.on_message(filters.command("slang") & filters.group)
 @admin_only
 async def toggle_slang(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     if len(message.command) < 2:
         await message.reply_text(get_lang("slang_usage", lang))
         return
     status = message.command[1].lower()
     if status == "on":
         await db.set_slang_filter(message.chat.id, True)
-        cache.set_setting(message.chat.id, "slang_enabled", True)
+        apply_chat_config(message.chat.id, slang_enabled=True)
         await message.reply_text(get_lang("slang_enabled", lang))
     elif status == "off":
         await db.set_slang_filter(message.chat.id, False)
-        cache.set_setting(message.chat.id, "slang_enabled", False)
+        apply_chat_config(message.chat.id, slang_enabled=False)
         await message.reply_text(get_lang("slang_disabled", lang))
     else:
         await message.reply_text(get_lang("slang_usage", lang))
 
-@Client.on_message(filters.group & filters.text)
-async def check_slang(client: Client, message: Message):
+@Client.on_message(filters.command("addslang") & filters.group)
+@admin_only
+async def add_slang(client: Client, message: Message):
+    lang = await get_group_lang(message.chat.id)
+    words = _parse_words(message)
+    if not words:
+        await message.reply_text(get_lang("addslang_usage", lang))
+        return
+    cfg = await get_chat_config(message.chat.id)
+    if len(set(cfg.slang_added) | set(words)) > SLANG_MAX_CUSTOM_WORDS:
+        await message.reply_text(get_lang("addslang_limit", lang, limit=SLANG_MAX_CUSTOM_WORDS))
+        return
+    fields = await db.add_slang_words(message.chat.id, words)
+    apply_chat_config(message.chat.id, **fields)
+    await message.reply_text(get_lang("addslang_success", lang, count=len(words)))
+
+@Client.on_message(filters.command("rmslang") & filters.group)
+@admin_only
+async def remove_slang(client: Client, message: Message):
+    lang = await get_group_lang(message.chat.id)
+    words = _parse_words(message)
+    if not words:
+        await message.reply_text(get_lang("rmslang_usage", lang))
+        return
+    fields = await db.remove_slang_words(message.chat.id, words)
+    apply_chat_config(message.chat.id, **fields)
+    await message.reply_text(get_lang("rmslang_success", lang, count=len(words)))
+
+@Client.on_message(filters.command("slanglist") & filters.group)
+@admin_only
+async def slang_list(client: Client, message: Message):
+    lang = await get_group_lang(message.chat.id)
+    cfg = await get_chat_config(message.chat.id)
+    if not cfg.slang_added and not cfg.slang_removed:
+        await message.reply_text(get_lang("slanglist_empty", lang))
+        return
+    lines = [get_lang("slanglist_header", lang), ""]
+    if cfg.slang_added:
+        lines.append(get_lang("slanglist_added", lang, words=", ".join(f"||{w}||" for w in cfg.slang_added)))
+    if cfg.slang_removed:
+        lines.append(get_lang("slanglist_removed", lang, words=", ".join(f"||{w}||" for w in cfg.slang_removed)))
+    await message.reply_text("\n".join(lines))
+
+@guard("slang", order=40, kinds=("text",), enabled=lambda cfg: cfg.slang_enabled)
+async def check_slang(ctx) -> bool:
+    client, message = ctx.client, ctx.message
     try:
         if message.edit_date:
-            return
-        enabled = cache.get_setting(message.chat.id, "slang_enabled")
-        if enabled is None:
-            enabled = await db.get_slang_status(message.chat.id)
-            cache.set_setting(message.chat.id, "slang_enabled", enabled)
-        if not enabled:
-            return
-        user_is_admin = await is_admin(client, message.chat.id, message.from_user.id)
-        if user_is_admin:
-            is_auth = cache.get_auth(message.chat.id, message.from_user.id, "slang")
-            if is_auth is None:
-                is_auth = await db.is_slang_authorized(message.chat.id, message.from_user.id)
-                cache.set_auth(message.chat.id, message.from_user.id, "slang", is_auth)
-            if is_auth:
-                return
-        text = message.text.lower()
-        found_words = [word for word in SLANG_WORDS if word in text]
+            return False
+        if await ctx.is_exempt("slang"):
+            return False
+        # the pipeline also sees commands; /addslang <word> from an admin is not abuse
+        if message.text.startswith("/") and await ctx.is_admin():
+            return False
+        matcher = await get_chat_matcher(ctx.config)
+        found_words = matcher.find(message.text)
         if found_words:
-            lang = await db.get_group_language(message.chat.id)
-            await message.delete()
+            lang = ctx.lang
+            deletions.delete_soon(client, message.chat.id, message.id)
             spoiler_words = " ".join(f"||{word}||" for word in found_words)
             keyboard = InlineKeyboardMarkup([[
                 InlineKeyboardButton("🚨 ʀᴇᴘᴏʀᴛ sᴘᴀᴍ", url=SUPPORT_CHAT)
@@ -71,13 +121,15 @@ async def check_slang(client: Client, message: Message):
                 warning_text,
                 reply_markup=keyboard
             )
+            return True
     except Exception as e:
         logger.error(f"Error checking slang: {e}")
+    return False
 
 @Client.on_message(filters.command("sauth") & filters.group)
 @admin_only
 async def slang_auth(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     if message.reply_to_message:
         user_id = message.reply_to_message.from_user.id
     elif len(message.command) > 1:
@@ -96,7 +148,7 @@ async def slang_auth(client: Client, message: Message):
 @Client.on_message(filters.command("sunauth") & filters.group)
 @admin_only
 async def slang_unauth(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     if message.reply_to_message:
         user_id = message.reply_to_message.from_user.id
     elif len(message.command) > 1:
@@ -114,7 +166,7 @@ async def slang_unauth(client: Client, message: Message):
 
 @Client.on_message(filters.command("sauthlist") & filters.group)
 async def slang_auth_list(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     auth_users = await db.get_slang_auth_list(message.chat.id)
     if not auth_users:
         await message.reply_text(get_lang("no_auth_users", lang))
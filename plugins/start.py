@@ -1,7 +1,7 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, LinkPreviewOptions
 import asyncio
-from utils.helpers import get_lang
+from utils.helpers import get_lang, get_user_lang, get_group_lang
 from utils.cache import get_cache
 from utils.database import Database
 from config import BOT_USERNAME, SUPPORT_CHANNEL
@@ -29,8 +29,7 @@ async def start_command(client: Client, message: Message):
         if cache:
             await asyncio.to_thread(lambda: cache.set_setting(user.id, "saved", True))
 
-    lang = await asyncio.to_thread(lambda: cache.get_setting(user.id, "language")) if cache else None
-    lang = lang or "en"
+    lang = await get_user_lang(user.id)
 
     add_me_url = f"https://t.me/{BOT_USERNAME.lstrip('@')}?startgroup=true"
     news_url = _normalize_channel_url(SUPPORT_CHANNEL)
@@ -66,8 +65,7 @@ async def start_group(client: Client, message: Message):
         if cache:
             await asyncio.to_thread(lambda: cache.set_setting(message.chat.id, "group_saved", True))
 
-    lang = await asyncio.to_thread(lambda: cache.get_setting(message.chat.id, "language")) if cache else None
-    lang = lang or "en"
+    lang = await get_group_lang(message.chat.id)
 
     kb = InlineKeyboardMarkup(
         [
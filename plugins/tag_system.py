@@ -2,12 +2,10 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 from pyrogram.errors import FloodWait
 from utils.decorators import admin_only
-from utils.helpers import get_lang
-from utils.database import Database
+from utils.helpers import get_lang, get_group_lang
 import asyncio
 import logging
 
-db = Database()
 logger = logging.getLogger(__name__)
 
 active_tags = {}
@@ -15,7 +13,7 @@ active_tags = {}
 @Client.on_message(filters.command("atag") & filters.group)
 @admin_only
 async def tag_admins(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     
     if message.chat.id in active_tags:
         await message.reply_text(get_lang("tag_already_running", lang))
@@ -64,7 +62,7 @@ async def tag_admins(client: Client, message: Message):
 @Client.on_message(filters.command("utag") & filters.group)
 @admin_only
 async def tag_users(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     
     if message.chat.id in active_tags:
         await message.reply_text(get_lang("tag_already_running", lang))
@@ -116,7 +114,7 @@ async def tag_users(client: Client, message: Message):
 @Client.on_message(filters.command("stop") & filters.group)
 @admin_only
 async def stop_tagging(client: Client, message: Message):
-    lang = await db.get_group_language(message.chat.id)
+    lang = await get_group_lang(message.chat.id)
     
     if message.chat.id in active_tags:
         del active_tags[message.chat.id]
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from pyrogram.enums import ChatMembersFilter
+from pyrogram.errors import FloodWait
+
+from config import ADMIN_ROSTER_RETRY
+from utils.cache import cache
+from utils.decorators import _normalize_status
+
+logger = logging.getLogger(__name__)
+
+_ADMIN_MARKERS = ("administrator", "creator", "owner")
+_CREATOR_MARKERS = ("creator", "owner")
+
+# chat_id -> the roster fill in flight, shared by everyone asking while it runs
+_pending = {}
+# no bulk fill is tried anywhere before this (time.monotonic()), set from a FloodWait
+_flood_until = 0.0
+
+# chats whose fill just failed: checks fall back to get_chat_member alone until ADMIN_ROSTER_RETRY
+_failed = cache.register("admin_roster_failed", ttl=max(1, ADMIN_ROSTER_RETRY), persist=False)
+
+
+def _is_admin_status(status: str) -> bool:
+    return any(k in status for k in _ADMIN_MARKERS)
+
+
+def _is_creator_status(status: str) -> bool:
+    return any(k in status for k in _CREATOR_MARKERS)
+
+
+async def _fetch_roster(client, chat_id: int) -> dict:
+    admins = []
+    creators = []
+    async for member in client.get_chat_members(chat_id, filter=ChatMembersFilter.ADMINISTRATORS):
+        user = getattr(member, "user", None)
+        if user is None:
+            continue
+        admins.append(user.id)
+        if _is_creator_status(_normalize_status(getattr(member, "status", None))):
+            creators.append(user.id)
+    return {"admins": admins, "creators": creators}
+
+
+async def _fill_roster(client, chat_id: int) -> Optional[dict]:
+    global _flood_until
+    try:
+        roster = await _fetch_roster(client, chat_id)
+    except FloodWait as e:
+        _flood_until = max(_flood_until, time.monotonic() + e.value)
+        logger.warning("admin roster fetch for %s hit FloodWait, no fills for %ss", chat_id, e.value)
+        return None
+    except Exception as e:
+        logger.warning("admin roster fetch failed for %s: %s", chat_id, e)
+        _failed.set(chat_id, True)
+        return None
+    cache.set_admins(chat_id, roster)
+    return roster
+
+
+async def get_admin_roster(client, chat_id: int, refresh: bool = False) -> Optional[dict]:
+    """Admin ids of a chat, filled in one get_chat_members call and kept until invalidated.
+
+    None while a recent fill failed or a FloodWait is running; callers then ask per user.
+    """
+    roster = None if refresh else cache.get_admins(chat_id)
+    if isinstance(roster, dict):
+        return roster
+    if refresh:
+        _failed.invalidate(chat_id)
+    elif chat_id in _failed:
+        return None
+    if time.monotonic() < _flood_until:
+        return None
+    # one fill per chat however many checks arrive while it runs; the entry goes only
+    # once the roster is cached, so a late caller either joins the fill or hits the cache
+    fut = _pending.get(chat_id)
+    if fut is None:
+        fut = _pending[chat_id] = asyncio.ensure_future(_fill_roster(client, chat_id))
+        fut.add_done_callback(lambda _: _pending.pop(chat_id, None))
+    return await asyncio.shield(fut)
+
+
+async def _member_status(client, chat_id: int, user_id: int) -> str:
+    try:
+        member = await client.get_chat_member(chat_id, user_id)
+    except Exception:
+        return ""
+    return _normalize_status(getattr(member, "status", None))
+
+
+async def is_chat_admin(client, chat_id: int, user_id: int) -> bool:
+    roster = await get_admin_roster(client, chat_id)
+    if roster is not None:
+        return user_id in roster["admins"]
+    return _is_admin_status(await _member_status(client, chat_id, user_id))
+
+
+async def is_chat_creator(client, chat_id: int, user_id: int) -> bool:
+    roster = await get_admin_roster(client, chat_id)
+    if roster is not None:
+        return user_id in roster["creators"]
+    return _is_creator_status(await _member_status(client, chat_id, user_id))
+
+
+def apply_member_update(chat_id: int, user_id: int, old_status, new_status) -> None:
+    """Patch a cached roster from a ChatMemberUpdated event instead of refetching it."""
+    old_s = _normalize_status(old_status)
+    new_s = _normalize_status(new_status)
+    if not (_is_admin_status(old_s) or _is_admin_status(new_s)):
+        return
+    roster = cache.get_admins(chat_id)
+    if not isinstance(roster, dict):
+        return
+    admins = [uid for uid in roster["admins"] if uid != user_id]
+    creators = [uid for uid in roster["creators"] if uid != user_id]
+    if _is_admin_status(new_s):
+        admins.append(user_id)
+        if _is_creator_status(new_s):
+            creators.append(user_id)
+    cache.set_admins(chat_id, {"admins": admins, "creators": creators})
+
+
+def invalidate_admin_roster(chat_id: int) -> None:
+    cache.clear_admins(chat_id)
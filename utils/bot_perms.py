@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import Dict, NamedTuple, Optional
+
+from pyrogram.errors import FloodWait
+
+from config import BOT_PERMS_RETRY, BOT_PERMS_TTL
+from utils.cache import cache
+from utils.decorators import _normalize_status
+
+logger = logging.getLogger(__name__)
+
+_me_id: Optional[int] = None
+_pending: Dict[int, asyncio.Future] = {}
+# a FloodWait on get_chat_member covers every chat, so it is remembered once until it has passed
+_flood: Optional[FloodWait] = None
+_flood_until = 0.0
+
+
+class BotPerms(NamedTuple):
+    can_send: bool
+    can_delete: bool
+
+
+NO_PERMS = BotPerms(False, False)
+
+# kept current by my_chat_member updates; the TTL is only a fallback for missed ones
+_perms = cache.register("bot_perms", ttl=BOT_PERMS_TTL, persist=False)
+# chats whose lookup just failed: answered as NO_PERMS until BOT_PERMS_RETRY, not for BOT_PERMS_TTL
+_failed = cache.register("bot_perms_failed", ttl=max(1, BOT_PERMS_RETRY), persist=False)
+
+
+def set_bot_user(user) -> None:
+    """Remember the bot's own id, normally from the get_me() done once at startup."""
+    global _me_id
+    if user is not None and getattr(user, "id", None):
+        _me_id = user.id
+
+
+async def bot_id(client) -> int:
+    if _me_id is None:
+        me = getattr(client, "me", None) or await client.get_me()
+        set_bot_user(me)
+    return _me_id
+
+
+def perms_from_member(member) -> BotPerms:
+    status = _normalize_status(getattr(member, "status", None))
+    if not status or any(k in status for k in ("left", "kicked", "banned")):
+        return NO_PERMS
+    if any(k in status for k in ("owner", "creator")):
+        return BotPerms(True, True)
+    can_send = True
+    can_delete = False
+    if "administrator" in status:
+        privileges = getattr(member, "privileges", None)
+        can_delete = bool(getattr(privileges, "can_delete_messages", False)) if privileges else False
+    elif "restricted" in status:
+        permissions = getattr(member, "permissions", None)
+        if permissions is not None:
+            can_send = bool(getattr(permissions, "can_send_messages", True))
+    # older layouts expose the flags on the member itself
+    if hasattr(member, "can_delete_messages"):
+        can_delete = bool(member.can_delete_messages)
+    if hasattr(member, "can_send_messages"):
+        can_send = bool(member.can_send_messages)
+    return BotPerms(can_send, can_delete)
+
+
+def apply_bot_update(chat_id: int, member) -> BotPerms:
+    """Take the bot's permissions from a ChatMemberUpdated instead of asking Telegram."""
+    perms = perms_from_member(member)
+    _perms.set(chat_id, perms)
+    _failed.invalidate(chat_id)
+    return perms
+
+
+async def _fetch(client, chat_id: int) -> BotPerms:
+    global _flood, _flood_until
+    try:
+        member = await client.get_chat_member(chat_id, await bot_id(client))
+    except FloodWait as e:
+        # says nothing about the bot's rights: callers get the FloodWait until it has passed
+        _flood, _flood_until = e, time.monotonic() + e.value
+        raise
+    except Exception as e:
+        logger.debug("bot permission lookup failed in %s: %s", chat_id, e)
+        _failed.set(chat_id, True)
+        return NO_PERMS
+    return apply_bot_update(chat_id, member)
+
+
+async def get_bot_perms(client, chat_id: int) -> BotPerms:
+    """The bot's send/delete rights in a chat: a cache read unless the entry is missing or stale.
+
+    Raises FloodWait while Telegram is rate limiting the lookup.
+    """
+    perms = _perms.get(chat_id)
+    if perms is not None:
+        return perms
+    if chat_id in _failed:
+        return NO_PERMS
+    if _flood is not None and time.monotonic() < _flood_until:
+        raise _flood.with_traceback(None)
+    # one lookup per chat however many messages arrive while it is in flight
+    fut = _pending.get(chat_id)
+    if fut is None:
+        fut = _pending[chat_id] = asyncio.ensure_future(_fetch(client, chat_id))
+        fut.add_done_callback(lambda _: _pending.pop(chat_id, None))
+    return await asyncio.shield(fut)
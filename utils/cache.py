@@ -1,28 +1,119 @@
+import asyncio
 import os
 import logging
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Hashable
 from cachetools import TTLCache
 import orjson
-from config import CACHE_TTL
+from config import CACHE_TTL, CACHE_MAXSIZE
 from utils import logger as ulogger
 
 logger = logging.getLogger(__name__)
 
 cache_manager = None
 
+_MISSING = object()
+
+
+class CacheNamespace:
+    """One typed bucket of the shared cache (admins, settings, auth, gban, ...)."""
+
+    def __init__(self, name: str, maxsize: int, ttl: int, persist: bool = True):
+        self.name = name
+        self.persist = persist
+        self.store = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.store
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.store.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.store[key] = value
+
+    def invalidate(self, key: Hashable) -> bool:
+        return self.store.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_chat(self, chat_id: int) -> int:
+        stale = [
+            k for k in list(self.store.keys())
+            if k == chat_id or (isinstance(k, tuple) and k and k[0] == chat_id)
+        ]
+        for k in stale:
+            self.store.pop(k, None)
+        return len(stale)
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def expire(self) -> int:
+        """Drop entries past their TTL now instead of on the next write; returns how many."""
+        before = len(self.store)
+        self.store.expire()
+        dropped = before - len(self.store)
+        self.expired += dropped
+        return dropped
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.store),
+            "maxsize": int(self.store.maxsize),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+        }
+
+    def dump(self) -> list:
+        return [[list(k) if isinstance(k, tuple) else k, v] for k, v in self.store.items()]
+
+    def restore(self, items: list) -> int:
+        count = 0
+        for item in items or []:
+            try:
+                k, v = item
+            except (TypeError, ValueError):
+                continue
+            self.store[tuple(k) if isinstance(k, list) else k] = v
+            count += 1
+        return count
+
+
 class CacheManager:
-    def __init__(self, maxsize: int = 10000, ttl: int = CACHE_TTL, storage_file: Optional[str] = None):
-        self.admin_cache = TTLCache(maxsize=maxsize, ttl=ttl)
-        self.settings_cache = TTLCache(maxsize=maxsize, ttl=ttl)
-        self.auth_cache = TTLCache(maxsize=maxsize, ttl=ttl)
-        self.gban_cache = TTLCache(maxsize=1000, ttl=ttl)
+    def __init__(self, maxsize: int = CACHE_MAXSIZE, ttl: int = CACHE_TTL, storage_file: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.namespaces: Dict[str, CacheNamespace] = {}
+        # not persisted: member updates missed while the bot was down would leave a restored roster stale
+        self.admins = self.register("admins", maxsize, ttl, persist=False)
+        self.settings = self.register("settings", maxsize, ttl)
+        self.auth = self.register("auth", maxsize, ttl)
+        self.gban = self.register("gban", 1000, ttl)
+        self.pretender = self.register("pretender", maxsize, ttl, persist=False)
+        self.db_loaded = False
         base_dir = os.path.dirname(__file__)
         self.storage_file = storage_file or os.path.join(base_dir, "cache_data.json")
-        try:
-            if ulogger.is_logging_enabled():
-                logger.info(f"Cache initialized maxsize={maxsize} ttl={ttl}s storage={self.storage_file}")
-        except Exception:
-            logger.info(f"Cache initialized maxsize={maxsize} ttl={ttl}s storage={self.storage_file}")
+        logger.info(f"Cache initialized maxsize={maxsize} ttl={ttl}s storage={self.storage_file}")
+
+    def register(self, name: str, maxsize: Optional[int] = None, ttl: Optional[int] = None, persist: bool = True) -> CacheNamespace:
+        ns = self.namespaces.get(name)
+        if ns is None:
+            ns = CacheNamespace(name, maxsize or self.maxsize, ttl or self.ttl, persist=persist)
+            self.namespaces[name] = ns
+        return ns
+
+    def namespace(self, name: str) -> CacheNamespace:
+        return self.namespaces[name]
 
     async def load_from_db(self, db) -> None:
         if db is None or not hasattr(db, "get_gban_list"):
@@ -33,24 +124,16 @@ class CacheManager:
             for user in gban_users:
                 uid = user.get("user_id") if isinstance(user, dict) else None
                 if uid is not None:
-                    self.gban_cache[uid] = True
+                    self.gban.set(uid, True)
                     count += 1
-            try:
-                if ulogger.is_logging_enabled():
-                    logger.info(f"Loaded {count} gbanned users from DB")
-            except Exception:
-                logger.info(f"Loaded {count} gbanned users from DB")
+            self.db_loaded = True
+            logger.info(f"Loaded {count} gbanned users from DB")
             self._save_to_file()
         except Exception as e:
             logger.error(f"Error loading cache from DB: {e}")
 
     def _serialize_cache(self) -> Dict[str, Any]:
-        return {
-            "admins": dict(self.admin_cache.items()),
-            "settings": dict(self.settings_cache.items()),
-            "auth": dict(self.auth_cache.items()),
-            "gban": list(self.gban_cache.keys())
-        }
+        return {name: ns.dump() for name, ns in self.namespaces.items() if ns.persist}
 
     def _save_to_file(self) -> None:
         try:
@@ -78,21 +161,11 @@ class CacheManager:
             if not raw:
                 return
             data = orjson.loads(raw)
-            admins = data.get("admins", {})
-            for k, v in admins.items():
-                self.admin_cache[k] = v
-            settings = data.get("settings", {})
-            for k, v in settings.items():
-                self.settings_cache[k] = v
-            auth = data.get("auth", {})
-            for k, v in auth.items():
-                self.auth_cache[k] = v
-            gban = data.get("gban", [])
-            for uid in gban:
-                try:
-                    self.gban_cache[int(uid)] = True
-                except Exception:
-                    self.gban_cache[uid] = True
+            for name, items in data.items():
+                ns = self.namespaces.get(name)
+                if ns is None or not ns.persist or not isinstance(items, list):
+                    continue
+                ns.restore(items)
             try:
                 if ulogger.is_logging_enabled():
                     logger.info(f"Loaded cache from {self.storage_file}")
@@ -101,65 +174,60 @@ class CacheManager:
         except Exception as e:
             logger.error(f"Failed to load cache from file: {e}")
 
-    def get_admin_cache_key(self, chat_id: int) -> str:
-        return f"admins:{chat_id}"
-
-    def get_settings_cache_key(self, chat_id: int, setting: str) -> str:
-        return f"settings:{chat_id}:{setting}"
-
-    def get_auth_cache_key(self, chat_id: int, user_id: int, auth_type: str) -> str:
-        return f"auth:{chat_id}:{user_id}:{auth_type}"
-
-    def set_admins(self, chat_id: int, admins: list, persist: bool = False) -> None:
-        key = self.get_admin_cache_key(chat_id)
-        self.admin_cache[key] = admins
+    def set_admins(self, chat_id: int, admins: Any, persist: bool = False) -> None:
+        self.admins.set(chat_id, admins)
         if persist:
             self._save_to_file()
 
-    def get_admins(self, chat_id: int) -> Optional[list]:
-        key = self.get_admin_cache_key(chat_id)
-        return self.admin_cache.get(key)
+    def get_admins(self, chat_id: int) -> Optional[Any]:
+        return self.admins.get(chat_id)
 
     def clear_admins(self, chat_id: int, persist: bool = False) -> None:
-        key = self.get_admin_cache_key(chat_id)
-        if key in self.admin_cache:
-            del self.admin_cache[key]
-            if persist:
-                self._save_to_file()
+        if self.admins.invalidate(chat_id) and persist:
+            self._save_to_file()
 
     def set_setting(self, chat_id: int, setting: str, value: Any, persist: bool = False) -> None:
-        key = self.get_settings_cache_key(chat_id, setting)
-        self.settings_cache[key] = value
+        self.settings.set((chat_id, setting), value)
         if persist:
             self._save_to_file()
 
     def get_setting(self, chat_id: int, setting: str) -> Optional[Any]:
-        key = self.get_settings_cache_key(chat_id, setting)
-        return self.settings_cache.get(key)
+        return self.settings.get((chat_id, setting))
+
+    def clear_setting(self, chat_id: int, setting: str) -> None:
+        self.settings.invalidate((chat_id, setting))
 
     def set_auth(self, chat_id: int, user_id: int, auth_type: str, value: bool, persist: bool = False) -> None:
-        key = self.get_auth_cache_key(chat_id, user_id, auth_type)
-        self.auth_cache[key] = value
+        self.auth.set((chat_id, user_id, auth_type), value)
         if persist:
             self._save_to_file()
 
     def get_auth(self, chat_id: int, user_id: int, auth_type: str) -> Optional[bool]:
-        key = self.get_auth_cache_key(chat_id, user_id, auth_type)
-        return self.auth_cache.get(key)
+        return self.auth.get((chat_id, user_id, auth_type))
 
     def set_gban(self, user_id: int, value: bool = True, persist: bool = False) -> None:
-        self.gban_cache[user_id] = value
+        self.gban.set(user_id, value)
         if persist:
             self._save_to_file()
 
     def get_gban(self, user_id: int) -> Optional[bool]:
-        return self.gban_cache.get(user_id)
+        return self.gban.get(user_id)
+
+    def invalidate_chat(self, chat_id: int) -> int:
+        dropped = 0
+        for ns in self.namespaces.values():
+            dropped += ns.invalidate_chat(chat_id)
+        return dropped
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: ns.stats() for name, ns in self.namespaces.items()}
+
+    def sweep(self) -> int:
+        return sum(ns.expire() for ns in self.namespaces.values())
 
     def clear_all(self, persist: bool = False) -> None:
-        self.admin_cache.clear()
-        self.settings_cache.clear()
-        self.auth_cache.clear()
-        self.gban_cache.clear()
+        for ns in self.namespaces.values():
+            ns.clear()
         if persist:
             self._save_to_file()
         try:
@@ -168,19 +236,50 @@ class CacheManager:
         except Exception:
             logger.info("All caches cleared")
 
-async def init_cache(db=None, maxsize: int = 10000, ttl: int = CACHE_TTL, use_db_once: bool = True, storage_file: Optional[str] = None):
+
+class _CacheProxy:
+    """Module-level handle plugins import at load time; resolves to the one shared CacheManager."""
+
+    def __getattr__(self, name):
+        return getattr(get_cache(), name)
+
+    def __bool__(self):
+        return True
+
+
+cache = _CacheProxy()
+
+
+async def init_cache(db=None, maxsize: int = CACHE_MAXSIZE, ttl: int = CACHE_TTL, use_db_once: bool = True, storage_file: Optional[str] = None):
     global cache_manager
     if cache_manager is None:
         cache_manager = CacheManager(maxsize=maxsize, ttl=ttl, storage_file=storage_file)
         cache_manager._load_from_file()
-        if use_db_once and db is not None:
-            try:
-                await cache_manager.load_from_db(db)
-            except Exception:
-                pass
+    if use_db_once and db is not None and not cache_manager.db_loaded:
+        try:
+            await cache_manager.load_from_db(db)
+        except Exception:
+            pass
     return cache_manager
 
+
+async def sweep_expired(interval: float) -> None:
+    """Expire stale entries every `interval` seconds so idle namespaces give memory back too."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            dropped = get_cache().sweep()
+            if dropped:
+                logger.debug("cache sweep dropped %d expired entries", dropped)
+        except Exception as e:
+            logger.error("cache sweep failed: %s", e)
+
+
 def get_cache() -> CacheManager:
+    global cache_manager
     if cache_manager is None:
-        raise RuntimeError("Cache not initialized. Call await init_cache(db, use_db_once=False) from startup.")
+        # first touch before main.init_cache(): create the shared instance now,
+        # init_cache() will still hydrate it from the DB later
+        cache_manager = CacheManager()
+        cache_manager._load_from_file()
     return cache_manager
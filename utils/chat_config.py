@@ -0,0 +1,79 @@
+import logging
+from dataclasses import dataclass, field, fields
+from typing import List, Optional
+
+from config import DEFAULT_LANG
+from utils.cache import cache
+from utils.database import Database
+
+logger = logging.getLogger(__name__)
+
+db = Database()
+
+
+@dataclass
+class ChatConfig:
+    """Every per-chat guard setting, hydrated from one chat_configs document."""
+
+    chat_id: int
+    media_enabled: bool = False
+    media_delay: Optional[int] = None
+    edit_enabled: bool = False
+    edit_delay: Optional[int] = None
+    slang_enabled: bool = False
+    slang_added: List[str] = field(default_factory=list)
+    slang_removed: List[str] = field(default_factory=list)
+    slang_version: int = 0
+    pretender_enabled: bool = False
+    auto_clean: bool = False
+    language: str = DEFAULT_LANG
+
+    @classmethod
+    def from_doc(cls, chat_id: int, doc: Optional[dict]) -> "ChatConfig":
+        cfg = cls(chat_id=chat_id)
+        if doc:
+            cfg.update(**doc)
+        return cfg
+
+    def update(self, **values) -> None:
+        for name in _FIELDS:
+            if name in values:
+                setattr(self, name, values[name])
+
+    @property
+    def active_media_delay(self) -> Optional[int]:
+        return self.media_delay if self.media_enabled else None
+
+    @property
+    def active_edit_delay(self) -> Optional[int]:
+        return self.edit_delay if self.edit_enabled else None
+
+
+_FIELDS = tuple(f.name for f in fields(ChatConfig) if f.name != "chat_id")
+
+_configs = cache.register("chat_config", persist=False)
+
+
+async def get_chat_config(chat_id: int) -> ChatConfig:
+    cfg = _configs.get(chat_id)
+    if cfg is not None:
+        return cfg
+    try:
+        doc = await db.get_chat_config(chat_id)
+    except Exception as e:
+        logger.warning("chat config load failed for %s: %s", chat_id, e)
+        return ChatConfig(chat_id=chat_id)
+    cfg = ChatConfig.from_doc(chat_id, doc)
+    _configs.set(chat_id, cfg)
+    return cfg
+
+
+def apply_chat_config(chat_id: int, **values) -> None:
+    # write-through after the Database setter persisted the change
+    cfg = _configs.get(chat_id)
+    if cfg is not None:
+        cfg.update(**values)
+
+
+def invalidate_chat_config(chat_id: int) -> None:
+    _configs.invalidate(chat_id)
@@ -1,14 +1,51 @@
+import asyncio
+import datetime
 import logging
 import time
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import DuplicateKeyError
-from config import MONGO_URI, DB_NAME
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from config import MONGO_URI, DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_MS, NSFW_VERDICT_TTL
 from utils import logger as ulogger
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_DB_NAME = "BillaGuardian"
 
+# one pooled client per URI for the whole process; Database() objects are views over it
+_clients = {}
+_indexes_ready = False
+_indexes_lock = None
+# a failed index bootstrap is retried from _ensure(), at most this often
+_INDEX_RETRY_SECONDS = 60
+_indexes_retry_at = 0.0
+
+
+def get_motor_client(uri=None) -> AsyncIOMotorClient:
+    uri = uri or MONGO_URI
+    client = _clients.get(uri)
+    if client is None:
+        client = AsyncIOMotorClient(
+            uri,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_MS,
+        )
+        _clients[uri] = client
+        logger.info(f"Mongo client created pool={MONGO_MIN_POOL_SIZE}..{MONGO_MAX_POOL_SIZE}")
+    return client
+
+
+def close_motor_clients() -> None:
+    global _indexes_ready
+    for client in list(_clients.values()):
+        try:
+            client.close()
+        except Exception:
+            pass
+    _clients.clear()
+    _indexes_ready = False
+
 class Database:
     def __init__(self):
         try:
@@ -35,6 +72,9 @@ class Database:
         self.admin_logs = None
         self.group_languages = None
         self.overall_stats = None
+        self.chat_configs = None
+        self.media_verdicts = None
+        self.scheduled_deletions = None
 
     def __bool__(self):
         return bool(self.client)
@@ -44,7 +84,7 @@ class Database:
             return
         db_name = DB_NAME if DB_NAME and isinstance(DB_NAME, str) and DB_NAME.strip() else DEFAULT_DB_NAME
         try:
-            self.client = AsyncIOMotorClient(MONGO_URI)
+            self.client = get_motor_client()
             self.db = self.client[db_name]
             self.active_groups = self.db["active_groups"]
             self.users = self.db["users"]
@@ -60,14 +100,33 @@ class Database:
             self.admin_logs = self.db["admin_logs"]
             self.group_languages = self.db["group_languages"]
             self.overall_stats = self.db["overall_stats"]
-            await self._create_indexes()
+            self.chat_configs = self.db["chat_configs"]
+            self.media_verdicts = self.db["media_verdicts"]
+            self.scheduled_deletions = self.db["scheduled_deletions"]
+            await self._ensure_indexes()
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             self.client = None
             self.db = None
             return
 
-    async def _create_indexes(self):
+    async def _ensure_indexes(self):
+        global _indexes_ready, _indexes_lock, _indexes_retry_at
+        if _indexes_ready:
+            return
+        if _indexes_lock is None:
+            _indexes_lock = asyncio.Lock()
+        async with _indexes_lock:
+            if _indexes_ready:
+                return
+            if await self._create_indexes():
+                _indexes_ready = True
+            else:
+                _indexes_retry_at = time.monotonic() + _INDEX_RETRY_SECONDS
+
+    async def _create_indexes(self) -> bool:
+        """Create every index; False if any of them failed, so the bootstrap is retried."""
+        ok = True
         try:
             await self.active_groups.create_index("chat_id", unique=True)
             await self.users.create_index("user_id", unique=True)
@@ -81,6 +140,11 @@ class Database:
             await self.media_auth.create_index([("chat_id", 1), ("user_id", 1)], unique=True)
             await self.slang_auth.create_index([("chat_id", 1), ("user_id", 1)], unique=True)
             await self.group_languages.create_index("chat_id", unique=True)
+            await self.chat_configs.create_index("chat_id", unique=True)
+            await self.media_verdicts.create_index("file_unique_id", unique=True)
+            await self.media_verdicts.create_index("phash")
+            await self.media_verdicts.create_index("hash_bands")
+            await self.scheduled_deletions.create_index("due_at")
             await self.overall_stats.update_one(
                 {"_id": "global"},
                 {"$setOnInsert": {"total_groups": 0, "total_users": 0}},
@@ -88,10 +152,29 @@ class Database:
             )
         except Exception as e:
             logger.warning("Error creating indexes: %s", e)
+            ok = False
+        ttl = max(1, NSFW_VERDICT_TTL)
+        try:
+            try:
+                await self.media_verdicts.create_index("updated_at", expireAfterSeconds=ttl)
+            except OperationFailure as e:
+                # IndexOptionsConflict: NSFW_VERDICT_TTL changed since the index was built
+                if e.code != 85:
+                    raise
+                await self.db.command(
+                    "collMod", "media_verdicts",
+                    index={"keyPattern": {"updated_at": 1}, "expireAfterSeconds": ttl},
+                )
+        except Exception as e:
+            logger.warning("Error creating media_verdicts TTL index: %s", e)
+            ok = False
+        return ok
 
     async def _ensure(self):
         if self.client is None or self.db is None or self.users is None:
             await self.connect()
+        elif not _indexes_ready and time.monotonic() >= _indexes_retry_at:
+            await self._ensure_indexes()
 
     async def add_active_group(self, chat_id, chat_title):
         await self._ensure()
@@ -145,6 +228,59 @@ class Database:
         await self._ensure()
         return [u async for u in self.users.find()]
 
+    async def _set_chat_config(self, chat_id, fields):
+        await self.chat_configs.update_one(
+            {"chat_id": chat_id},
+            {"$set": fields},
+            upsert=True,
+        )
+
+    async def get_chat_config(self, chat_id):
+        await self._ensure()
+        return await self.chat_configs.find_one({"chat_id": chat_id}, {"_id": 0})
+
+    async def migrate_chat_configs(self, force=False):
+        await self._ensure()
+        marker = await self.overall_stats.find_one({"_id": "chat_config_migration"})
+        if marker and marker.get("done") and not force:
+            return 0
+        merged = {}
+
+        def _put(chat_id, fields):
+            if chat_id is None:
+                return
+            merged.setdefault(chat_id, {}).update(fields)
+
+        async for d in self.media_settings.find():
+            _put(d.get("chat_id"), {"media_delay": d.get("delay"), "media_enabled": bool(d.get("enabled"))})
+        async for d in self.edit_settings.find():
+            _put(d.get("chat_id"), {"edit_delay": d.get("delay"), "edit_enabled": bool(d.get("enabled"))})
+        async for d in self.slang_settings.find():
+            _put(d.get("chat_id"), {
+                "slang_enabled": bool(d.get("enabled", False)),
+                "slang_added": d.get("added_words", []),
+                "slang_removed": d.get("removed_words", []),
+                "slang_version": int(d.get("words_version", 0)),
+            })
+        async for d in self.pretender_settings.find():
+            _put(d.get("chat_id"), {"pretender_enabled": bool(d.get("enabled", False))})
+        async for d in self.groups_stats.find({"auto_clean": {"$exists": True}}):
+            _put(d.get("chat_id"), {"auto_clean": bool(d.get("auto_clean", False))})
+        async for d in self.group_languages.find():
+            if d.get("language"):
+                _put(d.get("chat_id"), {"language": d.get("language")})
+
+        ops = [UpdateOne({"chat_id": cid}, {"$set": fields}, upsert=True) for cid, fields in merged.items()]
+        for i in range(0, len(ops), 1000):
+            await self.chat_configs.bulk_write(ops[i:i + 1000], ordered=False)
+        await self.overall_stats.update_one(
+            {"_id": "chat_config_migration"},
+            {"$set": {"done": True, "chats": len(merged), "timestamp": time.time()}},
+            upsert=True,
+        )
+        logger.info(f"Migrated settings of {len(merged)} chats into chat_configs")
+        return len(merged)
+
     async def set_media_delay(self, chat_id, delay):
         await self._ensure()
         await self.media_settings.update_one(
@@ -152,6 +288,7 @@ class Database:
             {"$set": {"delay": delay, "enabled": True}},
             upsert=True,
         )
+        await self._set_chat_config(chat_id, {"media_delay": delay, "media_enabled": True})
 
     async def get_media_delay(self, chat_id):
         await self._ensure()
@@ -165,6 +302,7 @@ class Database:
             {"$set": {"enabled": False}},
             upsert=True,
         )
+        await self._set_chat_config(chat_id, {"media_enabled": False})
 
     async def set_edit_delay(self, chat_id, delay):
         await self._ensure()
@@ -173,6 +311,7 @@ class Database:
             {"$set": {"delay": delay, "enabled": True}},
             upsert=True,
         )
+        await self._set_chat_config(chat_id, {"edit_delay": delay, "edit_enabled": True})
 
     async def get_edit_delay(self, chat_id):
         await self._ensure()
@@ -186,6 +325,33 @@ class Database:
             {"$set": {"enabled": enabled}},
             upsert=True,
         )
+        await self._set_chat_config(chat_id, {"slang_enabled": enabled})
+
+    async def _update_slang_words(self, chat_id, add_to, pull_from, words):
+        await self._ensure()
+        doc = await self.slang_settings.find_one_and_update(
+            {"chat_id": chat_id},
+            {
+                "$addToSet": {add_to: {"$each": words}},
+                "$pull": {pull_from: {"$in": words}},
+                "$inc": {"words_version": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        fields = {
+            "slang_added": doc.get("added_words", []),
+            "slang_removed": doc.get("removed_words", []),
+            "slang_version": int(doc.get("words_version", 0)),
+        }
+        await self._set_chat_config(chat_id, fields)
+        return fields
+
+    async def add_slang_words(self, chat_id, words):
+        return await self._update_slang_words(chat_id, "added_words", "removed_words", list(words))
+
+    async def remove_slang_words(self, chat_id, words):
+        return await self._update_slang_words(chat_id, "removed_words", "added_words", list(words))
 
     async def get_slang_status(self, chat_id):
         await self._ensure()
@@ -199,6 +365,7 @@ class Database:
             {"$set": {"auto_clean": enabled}},
             upsert=True,
         )
+        await self._set_chat_config(chat_id, {"auto_clean": enabled})
 
     async def get_auto_clean_status(self, chat_id):
         await self._ensure()
@@ -212,6 +379,7 @@ class Database:
             {"$set": {"enabled": enabled}},
             upsert=True,
         )
+        await self._set_chat_config(chat_id, {"pretender_enabled": enabled})
 
     async def get_pretender_status(self, chat_id):
         await self._ensure()
@@ -311,6 +479,51 @@ class Database:
         await self._ensure()
         return [u async for u in self.gban_users.find()]
 
+    async def get_media_verdict(self, file_unique_id):
+        await self._ensure()
+        return await self.media_verdicts.find_one({"file_unique_id": file_unique_id}, {"_id": 0})
+
+    async def find_media_verdict_by_hash(self, phash):
+        await self._ensure()
+        return await self.media_verdicts.find_one({"phash": phash}, {"_id": 0, "phash": 1, "label": 1, "score": 1})
+
+    async def find_media_verdicts(self, bands):
+        await self._ensure()
+        cursor = self.media_verdicts.find({"hash_bands": {"$in": bands}}, {"_id": 0, "phash": 1, "label": 1, "score": 1})
+        return [d async for d in cursor]
+
+    async def save_media_verdict(self, file_unique_id, phash, bands, label, score):
+        await self._ensure()
+        fields = {
+            "label": label,
+            "score": score,
+            "timestamp": time.time(),
+            "updated_at": datetime.datetime.now(datetime.timezone.utc),
+        }
+        if phash is not None:
+            fields["phash"] = phash
+            fields["hash_bands"] = bands
+        await self.media_verdicts.update_one(
+            {"file_unique_id": file_unique_id},
+            {"$set": fields},
+            upsert=True
+        )
+
+    async def add_scheduled_deletions(self, docs):
+        await self._ensure()
+        if docs:
+            await self.scheduled_deletions.insert_many(docs, ordered=False)
+
+    async def get_scheduled_deletions(self):
+        await self._ensure()
+        cursor = self.scheduled_deletions.find({}).sort("due_at", 1)
+        return [d async for d in cursor]
+
+    async def remove_scheduled_deletions(self, ids):
+        await self._ensure()
+        if ids:
+            await self.scheduled_deletions.delete_many({"_id": {"$in": list(ids)}})
+
     async def set_group_language(self, chat_id, lang):
         await self._ensure()
         await self.group_languages.update_one(
@@ -318,6 +531,7 @@ class Database:
             {"$set": {"language": lang}},
             upsert=True
         )
+        await self._set_chat_config(chat_id, {"language": lang})
 
     async def get_group_language(self, chat_id):
         await self._ensure()
@@ -80,10 +80,9 @@ def sudo_only(func):
             try:
                 lang = "en"
                 try:
-                    from utils.database import Database
-                    db = Database()
+                    from utils.helpers import get_group_lang
                     if message.chat and getattr(message.chat, "id", None):
-                        lang = await db.get_group_language(message.chat.id) or "en"
+                        lang = await get_group_lang(message.chat.id) or "en"
                 except Exception:
                     lang = "en"
                 await _reply_with_lang(message, "sudo_only", lang)
@@ -107,15 +106,13 @@ def admin_only(func):
                 await message.reply_text("❌ This command is for groups only!")
             return
         try:
-            member = await client.get_chat_member(message.chat.id, message.from_user.id)
-            status = _normalize_status(getattr(member, "status", None))
-            if not any(k in status for k in ("administrator", "creator", "owner", "admin")):
+            from utils.admin_cache import is_chat_admin
+            if not await is_chat_admin(client, message.chat.id, message.from_user.id):
                 try:
                     lang = "en"
                     try:
-                        from utils.database import Database
-                        db = Database()
-                        lang = await db.get_group_language(message.chat.id) or "en"
+                        from utils.helpers import get_group_lang
+                        lang = await get_group_lang(message.chat.id) or "en"
                     except Exception:
                         lang = "en"
                     await _reply_with_lang(message, "admin_only", lang)
@@ -142,15 +139,13 @@ def creator_only(func):
                 await message.reply_text("🛑 This command is for groups only!")
             return
         try:
-            member = await client.get_chat_member(message.chat.id, message.from_user.id)
-            status = _normalize_status(getattr(member, "status", None))
-            if "creator" not in status and "owner" not in status:
+            from utils.admin_cache import is_chat_creator
+            if not await is_chat_creator(client, message.chat.id, message.from_user.id):
                 try:
                     lang = "en"
                     try:
-                        from utils.database import Database
-                        db = Database()
-                        lang = await db.get_group_language(message.chat.id) or "en"
+                        from utils.helpers import get_group_lang
+                        lang = await get_group_lang(message.chat.id) or "en"
                     except Exception:
                         lang = "en"
                     await _reply_with_lang(message, "creator_only", lang)
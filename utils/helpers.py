@@ -4,10 +4,15 @@ import logging
 import asyncio
 from config import DEFAULT_LANG
 from utils.decorators import admin_only, creator_only
-from utils.cache import get_cache, init_cache
+from utils.cache import cache
+from utils.chat_config import get_chat_config, apply_chat_config
+from utils.admin_cache import is_chat_admin, is_chat_creator
+from utils.database import Database
 
 logger = logging.getLogger(__name__)
 
+db = Database()
+
 class LanguageManager:
     def __init__(self):
         self.languages = {}
@@ -69,79 +74,42 @@ lang_manager = LanguageManager()
 def get_lang(key, lang=DEFAULT_LANG, **kwargs):
     return lang_manager.get_string(key, lang, **kwargs)
 
-async def _ensure_cache():
-    try:
-        return get_cache()
-    except Exception:
-        try:
-            from utils.database import Database
-            db = Database()
-            try:
-                cache = await init_cache(db=db, use_db_once=False)
-                return cache
-            except Exception as e:
-                logger.warning("init_cache failed in helpers: %s", e)
-        except Exception as e:
-            logger.warning("Could not import Database for cache init in helpers: %s", e)
-        class _FallbackCache:
-            def get_setting(self, key, setting=None):
-                return None
-            def set_setting(self, key, setting, value):
-                return None
-        return _FallbackCache()
-
 async def get_user_lang(user_id: int) -> str:
-    cache = await _ensure_cache()
-    try:
-        lang = await asyncio.to_thread(lambda: cache.get_setting(user_id, "language"))
-    except Exception:
-        lang = None
+    lang = cache.get_setting(user_id, "language")
     if lang:
         return lang
-    from utils.database import Database
-    db = Database()
     try:
         lang = await db.get_user_language(user_id) or DEFAULT_LANG
     except Exception:
         lang = DEFAULT_LANG
-    try:
-        await asyncio.to_thread(lambda: cache.set_setting(user_id, "language", lang))
-    except Exception:
-        pass
+    cache.set_setting(user_id, "language", lang)
     return lang
 
+def set_user_lang(user_id: int, lang: str):
+    # cache first so the next read sees it, DB write runs in the background
+    cache.set_setting(user_id, "language", lang)
+    return asyncio.create_task(db.set_user_language(user_id, lang))
+
 async def get_group_lang(chat_id: int) -> str:
-    cache = await _ensure_cache()
     try:
-        lang = await asyncio.to_thread(lambda: cache.get_setting(chat_id, "language"))
+        return (await get_chat_config(chat_id)).language or DEFAULT_LANG
     except Exception:
-        lang = None
-    if lang:
-        return lang
-    from utils.database import Database
-    db = Database()
-    try:
-        lang = await db.get_group_language(chat_id) or DEFAULT_LANG
-    except Exception:
-        lang = DEFAULT_LANG
-    try:
-        await asyncio.to_thread(lambda: cache.set_setting(chat_id, "language", lang))
-    except Exception:
-        pass
-    return lang
+        return DEFAULT_LANG
+
+def set_group_lang(chat_id: int, lang: str):
+    apply_chat_config(chat_id, language=lang)
+    return asyncio.create_task(db.set_group_language(chat_id, lang))
 
 async def is_admin(client, chat_id, user_id):
     try:
-        member = await client.get_chat_member(chat_id, user_id)
-        return member.status in ["creator", "administrator"]
-    except:
+        return await is_chat_admin(client, chat_id, user_id)
+    except Exception:
         return False
 
 async def is_creator(client, chat_id, user_id):
     try:
-        member = await client.get_chat_member(chat_id, user_id)
-        return member.status == "creator"
-    except:
+        return await is_chat_creator(client, chat_id, user_id)
+    except Exception:
         return False
 
 
@@ -157,8 +125,20 @@ def _find_slang_file():
             return p
     return os.path.join(base_dir, "slang_words.txt")
 
+def read_slang_words(path):
+    """Strict read of a slang list: I/O and decode errors propagate instead of yielding an empty set."""
+    slang_words = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = line.strip()
+            if not word or word.startswith("#"):
+                continue
+            # only to dedupe case variants; SlangMatcher folds words and messages alike via utils.normalize
+            slang_words.add(word.lower())
+    return slang_words
+
 def load_slang_words():
-    slang_variants = set()
+    slang_words = set()
     slang_file = _find_slang_file()
     try:
         if not os.path.isfile(slang_file):
@@ -168,23 +148,9 @@ def load_slang_words():
             with open(slang_file, "w", encoding="utf-8") as f:
                 f.write("# Add slang words here\n")
             return set()
-        with open(slang_file, "r", encoding="utf-8") as f:
-            for line in f:
-                word = line.strip()
-                if not word or word.startswith("#"):
-                    continue
-                lower = word.lower()
-                slang_variants.add(lower)
-                if word != lower:
-                    slang_variants.add(word)
-                title = lower.title()
-                if title != word and title != lower:
-                    slang_variants.add(title)
-                upper = lower.upper()
-                if upper != word and upper != lower:
-                    slang_variants.add(upper)
-        logger.info(f"Loaded {len(slang_variants)} slang word variants from {slang_file}")
-        return slang_variants
+        slang_words = read_slang_words(slang_file)
+        logger.info(f"Loaded {len(slang_words)} slang words from {slang_file}")
+        return slang_words
     except Exception as e:
         logger.warning("Failed to load slang words: %s", e)
         return set()
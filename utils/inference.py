@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BatchInferenceService:
+    """Queue in front of a blocking batch model call.
+
+    Callers get a future per item; a single worker task drains the queue into micro-batches
+    (up to max_batch items, or whatever arrived within max_latency_ms of the first one) and
+    runs each batch on a dedicated executor so model CPU time never lands on the event loop.
+    With a `runner` (e.g. WorkerPool.run) and concurrency > 1, several batches are in flight at once.
+    An exception returned in place of one item's result fails only that item's future.
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], max_batch: int = 8,
+                 max_latency_ms: float = 25, name: str = "inference",
+                 runner: Optional[Callable[..., Awaitable]] = None, concurrency: int = 1):
+        self.run_batch = run_batch
+        self.max_batch = max(1, int(max_batch))
+        self.max_latency = max(0.0, float(max_latency_ms)) / 1000
+        self.name = name
+        self.runner = runner
+        self.concurrency = max(1, int(concurrency))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight = set()
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            return
+        self._queue = asyncio.Queue()
+        if self._executor is None and self.runner is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, item: Any) -> "asyncio.Future":
+        self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, fut))
+        return fut
+
+    async def infer(self, item: Any) -> Any:
+        return await self.submit(item)
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            batch = await self._collect()
+            # callers that gave up (timeouts, cancelled handlers) don't cost model time
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if not batch:
+                continue
+            await slots.acquire()
+            task = loop.create_task(self._process(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            task.add_done_callback(lambda _t: slots.release())
+
+    async def _process(self, batch: list) -> None:
+        items = [item for item, _ in batch]
+        started = time.perf_counter()
+        try:
+            if self.runner is not None:
+                results = await self.runner(self.run_batch, items)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(self._executor, self.run_batch, items)
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: got {len(results)} results for {len(batch)} items")
+        except asyncio.CancelledError:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.cancel()
+            raise
+        except Exception as e:
+            logger.error("%s batch of %d failed: %s", self.name, len(batch), e)
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.items += len(batch)
+        for (_, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            # run_batch may fail single items by returning their exception in place of a result
+            if isinstance(result, BaseException):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "inflight": len(self._inflight),
+            "busy_s": round(self.busy_seconds, 2),
+        }
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._inflight):
+            task.cancel()
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, fut = self._queue.get_nowait()
+                if not fut.done():
+                    fut.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def benchmark(run_batch: Callable[[List[Any]], List[Any]], make_item: Callable[[], Any],
+              sizes=(1, 2, 4, 8, 16), total: int = 64) -> dict:
+    """Items/second for each batch size when `total` requests arrive at once."""
+
+    async def _one(size):
+        service = BatchInferenceService(run_batch, max_batch=size, max_latency_ms=50, name=f"bench{size}")
+        items = [make_item() for _ in range(total)]
+        await service.infer(items[0])  # warm the executor thread and the model
+        t0 = time.perf_counter()
+        await asyncio.gather(*(service.infer(item) for item in items))
+        elapsed = time.perf_counter() - t0
+        await service.close()
+        return {"items_per_s": round(total / elapsed, 1), "ms_per_item": round(elapsed / total * 1000, 2)}
+
+    async def _all():
+        return {size: await _one(size) for size in sizes}
+
+    return asyncio.run(_all())
+
+
+if __name__ == "__main__":
+    import json
+
+    from PIL import Image
+    from transformers import pipeline
+
+    classifier = pipeline("image-classification", model="Falconsai/nsfw_image_detection")
+
+    def _run(images):
+        return classifier(images, batch_size=len(images))
+
+    def _noise():
+        import os
+        return Image.frombytes("RGB", (224, 224), os.urandom(224 * 224 * 3))
+
+    print(json.dumps(benchmark(_run, _noise), indent=2))
@@ -1,9 +1,7 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
-import asyncio
 import logging
-from utils.helpers import get_lang
-from utils.cache import get_cache, init_cache
+from utils.helpers import get_lang, get_user_lang, get_group_lang, set_user_lang, set_group_lang, is_admin
 from utils.decorators import admin_only
 
 log = logging.getLogger("bot.lang")
@@ -22,67 +20,6 @@ def get_language_keyboard(current_lang: str = "en"):
     buttons.append([InlineKeyboardButton("❌ Close", callback_data="lang_close")])
     return InlineKeyboardMarkup(buttons)
 
-async def _ensure_cache():
-    try:
-        return get_cache()
-    except Exception:
-        try:
-            from utils.database import Database
-            db = Database()
-            try:
-                cache = await init_cache(db=db, use_db_once=False)
-                return cache
-            except Exception as e:
-                log.warning("init_cache failed: %s. Falling back to in-memory cache.", e)
-        except Exception as e:
-            log.warning("Could not import Database for cache init: %s", e)
-        class _FallbackCache:
-            def get_setting(self, key, setting=None):
-                return None
-            def set_setting(self, key, setting, value):
-                return None
-        return _FallbackCache()
-
-async def get_user_lang(user_id: int) -> str:
-    cache = await _ensure_cache()
-    try:
-        lang = await asyncio.to_thread(lambda: cache.get_setting(user_id, "language"))
-    except Exception:
-        lang = None
-    if lang:
-        return lang
-    from utils.database import Database
-    db = Database()
-    try:
-        lang = await db.get_user_language(user_id) or "en"
-    except Exception:
-        lang = "en"
-    try:
-        await asyncio.to_thread(lambda: cache.set_setting(user_id, "language", lang))
-    except Exception:
-        pass
-    return lang
-
-async def get_group_lang(chat_id: int) -> str:
-    cache = await _ensure_cache()
-    try:
-        lang = await asyncio.to_thread(lambda: cache.get_setting(chat_id, "language"))
-    except Exception:
-        lang = None
-    if lang:
-        return lang
-    from utils.database import Database
-    db = Database()
-    try:
-        lang = await db.get_group_language(chat_id) or "en"
-    except Exception:
-        lang = "en"
-    try:
-        await asyncio.to_thread(lambda: cache.set_setting(chat_id, "language", lang))
-    except Exception:
-        pass
-    return lang
-
 @Client.on_message(filters.command("pinglang") & filters.private)
 async def _pinglang(client: Client, message: Message):
     await message.reply_text("lang plugin active")
@@ -106,15 +43,7 @@ async def change_language_group_admin(client: Client, message: Message):
 
 @Client.on_message(filters.command("lang") & ~filters.private)
 async def change_language_group_nonadmin(client: Client, message: Message):
-    try:
-        member = await client.get_chat_member(message.chat.id, message.from_user.id)
-    except Exception as e:
-        log.warning("get_chat_member failed in change_language_group_nonadmin: %s", e)
-        lang = await get_group_lang(message.chat.id)
-        await message.reply_text(get_lang("admin_only", lang))
-        return
-    status = (getattr(member, "status", "") or "").lower()
-    if status in ("creator", "administrator"):
+    if await is_admin(client, message.chat.id, message.from_user.id):
         return
     lang = await get_group_lang(message.chat.id)
     await message.reply_text(get_lang("admin_only", lang))
@@ -136,15 +65,7 @@ async def open_language_menu(client: Client, callback: CallbackQuery):
                 pass
         await callback.answer()
         return
-    try:
-        member = await client.get_chat_member(msg.chat.id, callback.from_user.id)
-    except Exception as e:
-        log.warning("get_chat_member failed in open_language_menu: %s", e)
-        lang = await get_group_lang(msg.chat.id)
-        await callback.answer(get_lang("admin_only", lang), show_alert=True)
-        return
-    status = (getattr(member, "status", "") or "").lower()
-    if status not in ("creator", "administrator"):
+    if not await is_admin(client, msg.chat.id, callback.from_user.id):
         lang = await get_group_lang(msg.chat.id)
         await callback.answer(get_lang("admin_only", lang), show_alert=True)
         return
@@ -187,14 +108,7 @@ async def language_callback(client: Client, callback: CallbackQuery):
             except Exception:
                 pass
             return
-        try:
-            cache = get_cache()
-            await asyncio.to_thread(lambda: cache.set_setting(callback.from_user.id, "language", data))
-        except Exception:
-            pass
-        from utils.database import Database
-        db = Database()
-        asyncio.create_task(db.set_user_language(callback.from_user.id, data))
+        set_user_lang(callback.from_user.id, data)
         text = get_lang("lang_changed_user", data)
         keyboard = get_language_keyboard(data)
         try:
@@ -204,14 +118,7 @@ async def language_callback(client: Client, callback: CallbackQuery):
             await callback.message.reply_text(text, reply_markup=keyboard)
             await callback.answer("Language updated!")
         return
-    try:
-        member = await client.get_chat_member(msg.chat.id, callback.from_user.id)
-    except Exception as e:
-        log.warning("get_chat_member failed in language_callback: %s", e)
-        await callback.answer("Could not verify admin status", show_alert=True)
-        return
-    status = (getattr(member, "status", "") or "").lower()
-    if status not in ("creator", "administrator"):
+    if not await is_admin(client, msg.chat.id, callback.from_user.id):
         await callback.answer("You need to be an admin!", show_alert=True)
         return
     old_lang = await get_group_lang(msg.chat.id)
@@ -223,14 +130,7 @@ async def language_callback(client: Client, callback: CallbackQuery):
         except Exception:
             pass
         return
-    try:
-        cache = get_cache()
-        await asyncio.to_thread(lambda: cache.set_setting(msg.chat.id, "language", data))
-    except Exception:
-        pass
-    from utils.database import Database
-    db = Database()
-    asyncio.create_task(db.set_group_language(msg.chat.id, data))
+    set_group_lang(msg.chat.id, data)
     text = get_lang("lang_changed_group", data)
     keyboard = get_language_keyboard(data)
     try:
@@ -0,0 +1,54 @@
+import importlib
+import logging
+import threading
+import time
+import types
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_modules: Dict[str, "LazyModule"] = {}
+_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a heavy module: the real import runs on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+        self._load_ms = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            # first use may come from a worker thread and the event loop at once
+            with _lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    self._module = importlib.import_module(self.__name__)
+                    self._load_ms = (time.perf_counter() - started) * 1000
+                    logger.info("Deferred import %s loaded on first use (%.0f ms)", self.__name__, self._load_ms)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "deferred"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a shared LazyModule for `name`; attribute access imports it."""
+    with _lock:
+        module = _modules.get(name)
+        if module is None:
+            module = _modules[name] = LazyModule(name)
+    return module
+
+
+def lazy_stats() -> Dict[str, object]:
+    """name -> import time in ms once loaded, None while still deferred."""
+    return {name: (round(m._load_ms, 1) if m._load_ms is not None else None) for name, m in _modules.items()}
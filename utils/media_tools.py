@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import tempfile
+from typing import List, Optional, Sequence, Tuple, Union
+
+from config import FFMPEG_CONCURRENCY, FFMPEG_TIMEOUT, MEDIA_MEMORY_LIMIT
+
+logger = logging.getLogger(__name__)
+
+_slots: Optional[asyncio.Semaphore] = None
+
+# seconds; longer clips are sampled from keyframes only
+KEYFRAME_ONLY_AFTER = 30
+
+
+def _semaphore() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(max(1, FFMPEG_CONCURRENCY))
+    return _slots
+
+
+async def _reap(proc) -> None:
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+
+
+async def run_ffmpeg(args: Sequence[str], timeout: float = FFMPEG_TIMEOUT) -> Tuple[int, bytes, bytes]:
+    """Run ffmpeg without blocking the loop; at most FFMPEG_CONCURRENCY run at once.
+
+    On timeout or cancellation the process is killed and reaped before the error propagates.
+    """
+    async with _semaphore():
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except BaseException:
+            await asyncio.shield(_reap(proc))
+            raise
+        return proc.returncode, stdout, stderr
+
+
+async def sample_frames(video_path: str, count: int, duration: Optional[float] = None, size: int = 224,
+                        timeout: float = FFMPEG_TIMEOUT) -> List[bytes]:
+    """Up to `count` evenly spaced frames as raw size x size RGB24 buffers, from one ffmpeg run.
+
+    Frames go straight to a pipe, so there is no trimmed copy and no JPEG round trip. Long clips
+    only decode keyframes (the fps filter picks the nearest one); on short clips a single GOP can
+    cover everything, so those are decoded fully.
+    """
+    rate = f"{count}/{duration:.3f}" if duration and duration > 0 else "2"
+    frame_bytes = size * size * 3
+    modes = (True, False) if duration and duration > KEYFRAME_ONLY_AFTER else (False,)
+    for keyframes_only in modes:
+        args = ["-skip_frame", "nokey"] if keyframes_only else []
+        args += [
+            "-i", video_path, "-an",
+            "-vf", f"fps={rate},scale={size}:{size}",
+            "-frames:v", str(count),
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1",
+        ]
+        try:
+            code, out, stderr = await run_ffmpeg(args, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("ffmpeg frame sampling timed out for %s", video_path)
+            return []
+        except OSError as e:
+            logger.error("ffmpeg unavailable: %s", e)
+            return []
+        frames = [out[i:i + frame_bytes] for i in range(0, len(out) - frame_bytes + 1, frame_bytes)]
+        if frames:
+            return frames
+        # some streams mark no keyframes at all; decode everything instead
+        logger.debug("ffmpeg sampling (keyframes_only=%s) gave nothing for %s: %s", keyframes_only, video_path, stderr[-200:])
+    return []
+
+
+async def fetch_media(message, file_size: Optional[int], suffix: str = "", limit: int = MEDIA_MEMORY_LIMIT) -> Union[bytes, str]:
+    """Download into memory when it fits under `limit`, otherwise spill to a temp file.
+
+    Returns the bytes or the temp file path; pass the result to discard() when done.
+    """
+    if limit <= 0 or (file_size and file_size > limit):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        try:
+            await message.download(path)
+        except BaseException:
+            discard(path)
+            raise
+        return path
+    buf = await message.download(in_memory=True)
+    return buf.getvalue()
+
+
+def discard(source) -> None:
+    if isinstance(source, str) and os.path.exists(source):
+        try:
+            os.remove(source)
+        except OSError:
+            pass
@@ -0,0 +1,133 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from utils.admin_cache import is_chat_admin
+from utils.bot_perms import BotPerms, get_bot_perms
+from utils.cache import cache
+from utils.chat_config import ChatConfig, get_chat_config
+from utils.database import Database
+
+db = Database()
+logger = logging.getLogger(__name__)
+
+MEDIA_KINDS = ("photo", "video", "animation", "sticker", "document")
+
+
+def message_kind(message) -> Optional[str]:
+    if getattr(message, "text", None):
+        return "text"
+    for kind in MEDIA_KINDS:
+        if getattr(message, kind, None):
+            return kind
+    return None
+
+
+@dataclass
+class ModerationContext:
+    """Everything the guards need about one update, each piece looked up at most once."""
+
+    client: Any
+    message: Any
+    kind: str
+    config: ChatConfig
+    _admin: Optional[bool] = None
+    _gbanned: Optional[bool] = None
+    _auth: Dict[str, bool] = field(default_factory=dict)
+    _bot_perms: Optional[BotPerms] = None
+
+    @property
+    def chat_id(self) -> int:
+        return self.message.chat.id
+
+    @property
+    def user(self):
+        return self.message.from_user
+
+    @property
+    def lang(self) -> str:
+        return self.config.language
+
+    async def is_admin(self) -> bool:
+        if self._admin is None:
+            self._admin = await is_chat_admin(self.client, self.chat_id, self.user.id)
+        return self._admin
+
+    async def bot_perms(self) -> BotPerms:
+        if self._bot_perms is None:
+            self._bot_perms = await get_bot_perms(self.client, self.chat_id)
+        return self._bot_perms
+
+    async def is_gbanned(self) -> bool:
+        if self._gbanned is None:
+            gbanned = cache.get_gban(self.user.id)
+            if gbanned is None:
+                gbanned = await db.is_gbanned(self.user.id)
+                cache.set_gban(self.user.id, gbanned)
+            self._gbanned = bool(gbanned)
+        return self._gbanned
+
+    async def is_exempt(self, auth_type: str) -> bool:
+        """Admins that were explicitly authorized for this guard ("media", "slang", "edit")."""
+        if not await self.is_admin():
+            return False
+        if auth_type not in self._auth:
+            is_auth = cache.get_auth(self.chat_id, self.user.id, auth_type)
+            if is_auth is None:
+                is_auth = await getattr(db, f"is_{auth_type}_authorized")(self.chat_id, self.user.id)
+                cache.set_auth(self.chat_id, self.user.id, auth_type, is_auth)
+            self._auth[auth_type] = bool(is_auth)
+        return self._auth[auth_type]
+
+
+GuardFunc = Callable[[ModerationContext], Awaitable[bool]]
+
+
+@dataclass
+class Guard:
+    name: str
+    order: int
+    kinds: FrozenSet[str]
+    func: GuardFunc
+    enabled: Optional[Callable[[ChatConfig], bool]] = None
+
+
+_guards: List[Guard] = []
+
+
+def guard(name: str, order: int, kinds, enabled: Optional[Callable[[ChatConfig], bool]] = None):
+    """Register `func(ctx) -> bool` to run on matching messages; returning True stops the pipeline."""
+
+    def decorator(func: GuardFunc) -> GuardFunc:
+        _guards[:] = [g for g in _guards if g.name != name]
+        _guards.append(Guard(name, order, frozenset(kinds), func, enabled))
+        _guards.sort(key=lambda g: g.order)
+        return func
+
+    return decorator
+
+
+async def build_context(client, message) -> Optional[ModerationContext]:
+    kind = message_kind(message)
+    if kind is None or message.from_user is None:
+        return None
+    config = await get_chat_config(message.chat.id)
+    return ModerationContext(client=client, message=message, kind=kind, config=config)
+
+
+async def run_pipeline(client, message) -> Optional[str]:
+    """Run the enabled guards in order; returns the name of the guard that stopped it, if any."""
+    ctx = await build_context(client, message)
+    if ctx is None:
+        return None
+    for g in _guards:
+        if ctx.kind not in g.kinds:
+            continue
+        if g.enabled is not None and not g.enabled(ctx.config):
+            continue
+        try:
+            if await g.func(ctx):
+                return g.name
+        except Exception as e:
+            logger.error("%s guard failed: %s", g.name, e, exc_info=True)
+    return None
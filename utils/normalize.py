@@ -0,0 +1,86 @@
+import re
+import unicodedata
+
+# zero-width / invisible characters people drop inside words to dodge filters
+_INVISIBLE = (
+    "\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e"
+    "\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff"
+)
+
+# combining marks stripped after NFKD: Latin diacritics and the Devanagari nukta
+_STRIP_MARKS = "".join(chr(c) for c in range(0x0300, 0x0370)) + "\u093c"
+
+# Cyrillic / Greek lookalikes folded onto Latin, Devanagari digits onto ASCII
+_CONFUSABLES = {
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "ѕ": "s", "і": "i", "ї": "i",
+    "ј": "j", "ԁ": "d", "ԛ": "q", "ԝ": "w", "ɡ": "g", "ı": "i", "ℓ": "l",
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+    "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w", "ς": "s", "σ": "s",
+    "०": "0", "१": "1", "२": "2", "३": "3", "४": "4", "५": "5", "६": "6", "७": "7", "८": "8", "९": "9",
+    "।": " ", "॥": " ",
+}
+
+_FOLD_TABLE = str.maketrans({**{c: None for c in _INVISIBLE + _STRIP_MARKS}, **_CONFUSABLES})
+
+# applied only inside tokens that also contain a letter, so "2 hours" keeps its digits
+_LEET_TABLE = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g",
+    "@": "a", "$": "s",
+})
+_LEET_CHARS = frozenset("01345789@$")
+_LEET_TOKEN_RE = re.compile(r"\S*[0-9@$]\S*")
+_MID_WORD_BANG_RE = re.compile(r"(?<=[^\W\d_])[!|](?=[^\W\d_])")
+
+# single characters split by separators: "f.u.c.k", "f u c k", "f-u_c*k"
+_SPACED_RE = re.compile(r"(?<!\w)(?:\w[\s.\-_*+~]{1,3}){2,}\w(?!\w)")
+_SEPARATORS_RE = re.compile(r"[\s.\-_*+~]+")
+
+_REPEAT_RE = re.compile(r"(.)\1+")
+
+
+def _leet_token(m: "re.Match") -> str:
+    tok = m.group(0)
+    for ch in tok:
+        if ch.isalpha():
+            return tok.translate(_LEET_TABLE)
+    return tok
+
+
+def _join_spaced(m: "re.Match") -> str:
+    return _SEPARATORS_RE.sub("", m.group(0))
+
+
+def normalize_text(text: str) -> str:
+    """Fold a message into the form slang words are indexed in (repeats are collapsed separately)."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text).translate(_FOLD_TABLE)
+    text = unicodedata.normalize("NFC", text).casefold()
+    if _LEET_CHARS.intersection(text):
+        text = _LEET_TOKEN_RE.sub(_leet_token, text)
+    if "!" in text or "|" in text:
+        text = _MID_WORD_BANG_RE.sub("i", text)
+    return _SPACED_RE.sub(_join_spaced, text)
+
+
+def collapse_repeats(text: str) -> str:
+    return _REPEAT_RE.sub(r"\1", text)
+
+
+def run_lengths(text: str) -> list:
+    """Length of each run of equal characters, aligned with collapse_repeats(text)."""
+    runs = []
+    prev = None
+    for ch in text:
+        if ch == prev:
+            runs[-1] += 1
+        else:
+            runs.append(1)
+            prev = ch
+    return runs
+
+
+def is_word_char(ch: str) -> bool:
+    # Devanagari vowel signs are combining marks, not alnum, but still part of the word
+    return ch.isalnum() or ch == "_" or unicodedata.category(ch)[0] == "M"
@@ -0,0 +1,276 @@
+import io
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+
+from config import NSFW_BACKEND, NSFW_ONNX_DIR
+from utils.lazy import lazy_import
+
+# pillow, like torch and transformers, is only paid for once something gets classified
+Image = lazy_import("PIL.Image")
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "Falconsai/nsfw_image_detection"
+BACKENDS = ("pytorch", "onnx", "onnx-int8")
+
+classifier = None
+
+# decoded frame handed over as raw RGB24 so it pickles cheaply to worker processes
+RawFrame = namedtuple("RawFrame", ["width", "height", "data"])
+
+
+class PipelineBackend:
+    """The reference path: full-precision PyTorch through transformers.pipeline."""
+
+    name = "pytorch"
+
+    def __init__(self, use_fast: bool = True, threads: int = 0):
+        from transformers import pipeline
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.pipe = pipeline("image-classification", model=MODEL_NAME, use_fast=use_fast)
+
+    def __call__(self, images):
+        results = self.pipe(images, batch_size=len(images))
+        if len(images) == 1 and results and isinstance(results[0], dict):
+            results = [results]
+        return results
+
+
+class OnnxBackend:
+    """ONNX Runtime on CPU, fp32 or dynamically quantized int8; no torch or transformers at runtime.
+
+    Expects the files written by export_onnx(): model.onnx / model.int8.onnx, config.json and
+    preprocessor_config.json.
+    """
+
+    def __init__(self, model_dir: str = NSFW_ONNX_DIR, quantized: bool = True, threads: int = 0):
+        import numpy as np
+        import onnxruntime as ort
+
+        self.np = np
+        self.name = "onnx-int8" if quantized else "onnx"
+        path = os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        with open(os.path.join(model_dir, "config.json"), "r", encoding="utf-8") as f:
+            id2label = json.load(f)["id2label"]
+        self.labels = [id2label[str(i)] for i in range(len(id2label))]
+        with open(os.path.join(model_dir, "preprocessor_config.json"), "r", encoding="utf-8") as f:
+            prep = json.load(f)
+        size = prep.get("size", {})
+        self.size = (int(size.get("width", 224)), int(size.get("height", 224)))
+        self.resample = int(prep.get("resample", Image.BILINEAR))
+        self.rescale = float(prep.get("rescale_factor", 1 / 255)) if prep.get("do_rescale", True) else 1.0
+        if prep.get("do_normalize", True):
+            self.mean = np.asarray(prep.get("image_mean", [0.5, 0.5, 0.5]), dtype=np.float32)
+            self.std = np.asarray(prep.get("image_std", [0.5, 0.5, 0.5]), dtype=np.float32)
+        else:
+            self.mean = np.zeros(3, dtype=np.float32)
+            self.std = np.ones(3, dtype=np.float32)
+
+    def _preprocess(self, images):
+        np = self.np
+        batch = np.stack([
+            np.asarray(img.resize(self.size, self.resample), dtype=np.float32) for img in images
+        ])
+        batch = (batch * self.rescale - self.mean) / self.std
+        return batch.transpose(0, 3, 1, 2).astype(np.float32)
+
+    def __call__(self, images):
+        np = self.np
+        logits = self.session.run(None, {self.input_name: self._preprocess(images)})[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        results = []
+        for row in probs:
+            order = row.argsort()[::-1]
+            results.append([{"label": self.labels[i], "score": float(row[i])} for i in order])
+        return results
+
+
+def create_backend(name: str = NSFW_BACKEND, use_fast: bool = True, threads: int = 0):
+    if name == "pytorch":
+        return PipelineBackend(use_fast, threads)
+    if name in ("onnx", "onnx-int8"):
+        if not use_fast:
+            logger.warning("the slow image processor only exists for the pytorch backend, %s ignores it", name)
+        return OnnxBackend(NSFW_ONNX_DIR, quantized=name == "onnx-int8", threads=threads)
+    raise ValueError(f"unknown NSFW backend {name!r}, expected one of {BACKENDS}")
+
+
+def load(use_fast: bool = True, threads: int = 0, backend: str = NSFW_BACKEND):
+    global classifier
+    try:
+        classifier = create_backend(backend, use_fast, threads)
+    except Exception as e:
+        logger.error("nsfw model load failed (%s): %s", backend, e)
+        classifier = None
+    return classifier
+
+
+def to_image(item) -> "Image.Image":
+    if isinstance(item, RawFrame):
+        return Image.frombytes("RGB", (item.width, item.height), item.data)
+    if isinstance(item, (bytes, bytearray)):
+        return Image.open(io.BytesIO(item)).convert("RGB")
+    return Image.open(item).convert("RGB")
+
+
+def classify_batch(items):
+    """Top-k label dicts per item (path, encoded bytes or RawFrame), or None each while no model is loaded.
+
+    An item that cannot be decoded gets a ValueError in its slot instead of failing the whole batch.
+    """
+    model = classifier
+    if model is None:
+        return [None] * len(items)
+    results = [None] * len(items)
+    images = []
+    decoded = []
+    for i, item in enumerate(items):
+        try:
+            images.append(to_image(item))
+        except Exception as e:
+            # a plain ValueError pickles back from worker processes whatever PIL raised
+            results[i] = ValueError(f"undecodable image: {e}")
+            continue
+        decoded.append(i)
+    if images:
+        for i, result in zip(decoded, model(images)):
+            results[i] = result
+    return results
+
+
+def worker_init(use_fast: bool, threads: int) -> None:
+    # N processes each running with every core would just fight over them
+    load(use_fast, threads)
+
+
+def worker_ping():
+    # hold the worker briefly so a round of pings reaches every process, not just the first idle one
+    time.sleep(0.05)
+    return os.getpid(), classifier is not None
+
+
+def export_onnx(out_dir: str = NSFW_ONNX_DIR, quantize: bool = True) -> None:
+    """Export the Hugging Face model to ONNX (and an int8 copy) for OnnxBackend."""
+    import torch
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+    model = AutoModelForImageClassification.from_pretrained(MODEL_NAME).eval()
+    processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
+    os.makedirs(out_dir, exist_ok=True)
+    model.config.save_pretrained(out_dir)
+    processor.save_pretrained(out_dir)
+
+    class _Logits(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, pixel_values):
+            return self.inner(pixel_values=pixel_values).logits
+
+    size = processor.size
+    dummy = torch.zeros(1, 3, size.get("height", 224), size.get("width", 224))
+    path = os.path.join(out_dir, "model.onnx")
+    torch.onnx.export(
+        _Logits(model), (dummy,), path,
+        input_names=["pixel_values"], output_names=["logits"],
+        dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+    )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(path, os.path.join(out_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark(image_paths, backends=BACKENDS, batch: int = 8, rounds: int = 3) -> dict:
+    """Latency, memory and agreement with the first backend (the PyTorch pipeline) for each backend.
+
+    Images under a directory named nsfw/ or normal/ also count towards accuracy. RSS is measured
+    in one process, so run a single backend per invocation for clean memory numbers.
+    """
+    images = [to_image(p) for p in image_paths]
+    truth = [os.path.basename(os.path.dirname(p)).lower() for p in image_paths]
+    reference = None
+    report = {"images": len(images)}
+    for name in backends:
+        rss_before = _rss_mb()
+        t0 = time.perf_counter()
+        try:
+            backend = create_backend(name)
+        except Exception as e:
+            report[name] = {"error": str(e)}
+            continue
+        load_s = time.perf_counter() - t0
+        backend(images[:1])
+        preds = []
+        t0 = time.perf_counter()
+        for r in range(rounds):
+            for i in range(0, len(images), batch):
+                out = backend(images[i:i + batch])
+                if r == 0:
+                    preds.extend(max(res, key=lambda x: x["score"]) for res in out)
+        ms = (time.perf_counter() - t0) / (rounds * len(images)) * 1000
+        entry = {
+            "load_s": round(load_s, 2),
+            "ms_per_image": round(ms, 2),
+            "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+        }
+        if reference is None:
+            reference = preds
+        else:
+            same = [(p, q) for p, q in zip(preds, reference) if p["label"] == q["label"]]
+            entry["agreement"] = round(len(same) / len(preds), 4)
+            entry["max_score_delta"] = round(max((abs(p["score"] - q["score"]) for p, q in same), default=1.0), 4)
+        labelled = [(p, t) for p, t in zip(preds, truth) if t in ("nsfw", "normal")]
+        if labelled:
+            entry["accuracy"] = round(sum(p["label"].lower() == t for p, t in labelled) / len(labelled), 4)
+        report[name] = entry
+        del backend
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m utils.nsfw_model")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export", help="write the ONNX models to NSFW_ONNX_DIR")
+    exp.add_argument("--no-int8", action="store_true")
+    bench = sub.add_parser("bench", help="compare backends on a folder of images")
+    bench.add_argument("folder")
+    bench.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        export_onnx(quantize=not args.no_int8)
+        print(f"exported to {NSFW_ONNX_DIR}")
+    else:
+        paths = []
+        for root, _, files in os.walk(args.folder):
+            paths.extend(os.path.join(root, f) for f in files if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+        print(json.dumps(benchmark(sorted(paths), args.backends.split(",")), indent=2))
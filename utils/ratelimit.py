@@ -0,0 +1,111 @@
+import math
+import time
+from typing import Hashable, Optional
+
+from config import RATE_LIMIT_MAX_KEYS
+from utils.cache import cache
+
+
+class SlidingWindow:
+    """Events per key over the last `window` seconds, counted in `buckets` fixed slots.
+
+    Each key costs one small list no matter how busy it is, and hit() touches at most
+    `buckets` slots, so it is O(1) per event. The oldest slot (window / buckets seconds)
+    may already have rolled out of the count. A key idle for a whole window has
+    nothing left to count, so its TTL is the window and quiet chats simply expire.
+    """
+
+    def __init__(self, name: str, window: float, buckets: int = 10, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.window = float(window)
+        self.buckets = max(1, int(buckets))
+        self.step = self.window / self.buckets
+        # [current slot, running total, per-slot counts...]
+        self._state = cache.register(name, maxsize=maxsize, ttl=max(1, math.ceil(self.window)), persist=False)
+
+    def hit(self, key: Hashable, now: Optional[float] = None) -> int:
+        """Record one event for `key`; returns the events in the window including this one."""
+        slot = int((time.monotonic() if now is None else now) / self.step)
+        state = self._state.get(key)
+        if state is None or slot - state[0] >= self.buckets:
+            state = [slot, 0] + [0] * self.buckets
+        else:
+            # zero the slots that rolled out since the last event
+            for s in range(state[0] + 1, slot + 1):
+                i = 2 + s % self.buckets
+                state[1] -= state[i]
+                state[i] = 0
+            state[0] = max(state[0], slot)
+        state[2 + slot % self.buckets] += 1
+        state[1] += 1
+        self._state.set(key, state)
+        return state[1]
+
+    def count(self, key: Hashable, now: Optional[float] = None) -> int:
+        slot = int((time.monotonic() if now is None else now) / self.step)
+        state = self._state.get(key)
+        if state is None or slot - state[0] >= self.buckets:
+            return 0
+        expired = sum(state[2 + s % self.buckets] for s in range(state[0] + 1, slot + 1))
+        return state[1] - expired
+
+    def reset(self, key: Hashable) -> None:
+        self._state.invalidate(key)
+
+    def stats(self) -> dict:
+        return self._state.stats()
+
+
+class TokenBucket:
+    """`burst` events at once, refilled at `rate` per second, per key.
+
+    A key that has been idle long enough to refill completely is indistinguishable from a
+    new one, so that refill time is its TTL.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        ttl = max(1, math.ceil(self.burst / self.rate)) if self.rate > 0 else 86400
+        # key -> (tokens, last refill)
+        self._state = cache.register(name, maxsize=maxsize, ttl=ttl, persist=False)
+
+    def allow(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        """Take `cost` tokens for `key` if it has them."""
+        now = time.monotonic() if now is None else now
+        tokens, last = self._state.get(key) or (self.burst, now)
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._state.set(key, (tokens, now))
+        return allowed
+
+    def reset(self, key: Hashable) -> None:
+        self._state.invalidate(key)
+
+    def stats(self) -> dict:
+        return self._state.stats()
+
+
+class Cooldown:
+    """Keys that acted within the last `seconds`, e.g. (chat_id, user_id) pairs already warned.
+
+    A TTL set: entries expire on their own and are swept periodically, so memory follows
+    the keys active in the last `seconds`, not every key ever seen.
+    """
+
+    def __init__(self, name: str, seconds: float, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.seconds = seconds
+        self._keys = cache.register(name, maxsize=maxsize, ttl=seconds, persist=False)
+
+    def active(self, key: Hashable) -> bool:
+        return key in self._keys
+
+    def mark(self, key: Hashable) -> None:
+        self._keys.set(key, True)
+
+    def sweep(self) -> int:
+        return self._keys.expire()
+
+    def stats(self) -> dict:
+        return self._keys.stats()
@@ -0,0 +1,263 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+from pyrogram.errors import FloodWait
+
+from config import DELETE_COALESCE_MS
+from utils.cache import cache
+from utils.database import Database
+from utils.helpers import is_admin
+
+db = Database()
+logger = logging.getLogger(__name__)
+
+# Telegram accepts at most this many ids per delete_messages call
+DELETE_BATCH = 100
+FLOOD_RETRIES = 3
+COALESCE = max(0.0, DELETE_COALESCE_MS / 1000)
+
+
+class Deletion(NamedTuple):
+    # ordered so heap entries compare by due time first
+    due_at: float
+    job_id: ObjectId
+    chat_id: int
+    message_ids: Tuple[int, ...]
+    warning_ids: Tuple[int, ...]
+    user_id: Optional[int]
+    auth_type: Optional[str]
+    # False for delete_soon() jobs, which are never written to the journal
+    durable: bool = True
+
+    def to_doc(self) -> dict:
+        return {
+            "_id": self.job_id,
+            "due_at": self.due_at,
+            "chat_id": self.chat_id,
+            "message_ids": list(self.message_ids),
+            "warning_ids": list(self.warning_ids),
+            "user_id": self.user_id,
+            "auth_type": self.auth_type,
+        }
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Deletion":
+        return cls(
+            float(doc["due_at"]),
+            doc["_id"],
+            doc["chat_id"],
+            tuple(doc.get("message_ids") or ()),
+            tuple(doc.get("warning_ids") or ()),
+            doc.get("user_id"),
+            doc.get("auth_type"),
+        )
+
+
+async def _is_exempt(client, chat_id: int, user_id: int, auth_type: str) -> bool:
+    if not await is_admin(client, chat_id, user_id):
+        return False
+    is_auth = cache.get_auth(chat_id, user_id, auth_type)
+    if is_auth is None:
+        is_auth = await getattr(db, f"is_{auth_type}_authorized")(chat_id, user_id)
+        cache.set_auth(chat_id, user_id, auth_type, is_auth)
+    return bool(is_auth)
+
+
+async def delete_messages(client, chat_id: int, ids: List[int]) -> int:
+    """Delete `ids` in chunks of DELETE_BATCH, sleeping out FloodWait; returns how many went out."""
+    deleted = 0
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), DELETE_BATCH):
+        chunk = ids[start:start + DELETE_BATCH]
+        for attempt in range(FLOOD_RETRIES + 1):
+            try:
+                await client.delete_messages(chat_id, chunk)
+                deleted += len(chunk)
+                break
+            except FloodWait as e:
+                if attempt == FLOOD_RETRIES:
+                    logger.warning("giving up on %d deletion(s) in %s after FloodWait", len(chunk), chat_id)
+                    break
+                await asyncio.sleep(e.value + 1)
+            except Exception as e:
+                logger.debug("delete_messages failed in %s: %s", chat_id, e)
+                break
+    return deleted
+
+
+class DeletionScheduler:
+    """Delayed message deletions from one heap and one task, journaled to Mongo.
+
+    Each pending deletion is a small Deletion tuple, not a sleeping task holding Message
+    objects. Jobs due within COALESCE seconds of each other are grouped per chat into one
+    delete_messages call. The journal is replayed by start(), so a restart only delays what
+    was pending; overdue jobs fire at once.
+    """
+
+    def __init__(self):
+        self._heap: List[Deletion] = []
+        self._ids = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client = None
+        self._inflight = set()
+        self.fired = 0
+        self.failed = 0
+        self.calls = 0
+
+    def _push(self, job: Deletion) -> None:
+        if job.job_id in self._ids:
+            return
+        self._ids.add(job.job_id)
+        heapq.heappush(self._heap, job)
+        if self._wake is not None and self._heap[0] is job:
+            self._wake.set()
+
+    async def schedule(self, chat_id: int, message_ids: Iterable[int] = (), warning_ids: Iterable[int] = (),
+                       delay: float = 0, user_id: Optional[int] = None, auth_type: Optional[str] = None) -> Deletion:
+        """Delete `message_ids` and `warning_ids` after `delay` seconds.
+
+        With `user_id` and `auth_type`, the message_ids are kept if the user is an authorized
+        admin by then (the warnings go either way).
+        """
+        job = Deletion(
+            time.time() + max(0.0, delay),
+            ObjectId(),
+            chat_id,
+            tuple(i for i in message_ids if i),
+            tuple(i for i in warning_ids if i),
+            user_id,
+            auth_type,
+        )
+        self._push(job)
+        try:
+            await db.add_scheduled_deletions([job.to_doc()])
+        except Exception as e:
+            logger.warning("deletion journal write failed for chat %s: %s", chat_id, e)
+        return job
+
+    def delete_soon(self, client, chat_id: int, *message_ids: int) -> None:
+        """Delete now-ish: held for up to COALESCE seconds so a burst shares one API call.
+
+        Until start() (or after stop()) nothing would flush the heap, so the ids go out at once.
+        """
+        ids = tuple(i for i in message_ids if i)
+        if not ids:
+            return
+        if self._task is None or self._task.done():
+            task = asyncio.create_task(delete_messages(client, chat_id, list(ids)))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            return
+        self._push(Deletion(time.time() + COALESCE, ObjectId(), chat_id, ids, (), None, None, False))
+
+    async def start(self, client) -> int:
+        """Replay the journal and start firing; returns how many deletions were restored."""
+        self._client = client
+        self._wake = asyncio.Event()
+        restored = 0
+        try:
+            for doc in await db.get_scheduled_deletions():
+                try:
+                    job = Deletion.from_doc(doc)
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if job.job_id not in self._ids:
+                    self._push(job)
+                    restored += 1
+        except Exception as e:
+            logger.error("deletion journal replay failed: %s", e)
+        if restored:
+            logger.info("Restored %d pending deletion(s)", restored)
+        self._task = asyncio.create_task(self._run())
+        return restored
+
+    async def stop(self) -> None:
+        # pending jobs stay in the journal for the next start()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._inflight):
+            task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            timeout = self._heap[0].due_at - time.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            horizon = time.time() + COALESCE
+            due = []
+            while self._heap and self._heap[0].due_at <= horizon:
+                job = heapq.heappop(self._heap)
+                self._ids.discard(job.job_id)
+                due.append(job)
+            # fired in the background so a FloodWait sleep does not hold up later jobs
+            task = asyncio.create_task(self._fire(due))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _flush_chat(self, chat_id: int, jobs: List[Deletion]) -> None:
+        ids = []
+        for job in jobs:
+            keep = False
+            if job.message_ids and job.user_id and job.auth_type:
+                try:
+                    keep = await _is_exempt(self._client, chat_id, job.user_id, job.auth_type)
+                except Exception:
+                    keep = False
+            if not keep:
+                ids.extend(job.message_ids)
+            ids.extend(job.warning_ids)
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+        deleted = await delete_messages(self._client, chat_id, ids)
+        self.fired += deleted
+        self.failed += len(ids) - deleted
+        self.calls += -(-len(ids) // DELETE_BATCH)
+
+    async def _fire(self, due: List[Deletion]) -> None:
+        by_chat = defaultdict(list)
+        for job in due:
+            by_chat[job.chat_id].append(job)
+        # a FloodWait in one chat must not hold up the others
+        results = await asyncio.gather(
+            *(self._flush_chat(chat_id, jobs) for chat_id, jobs in by_chat.items()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("scheduled deletions failed: %s", result)
+        durable = [job.job_id for job in due if job.durable]
+        if not durable:
+            return
+        try:
+            await db.remove_scheduled_deletions(durable)
+        except Exception as e:
+            logger.warning("deletion journal cleanup failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._heap),
+            "next_in": round(self._heap[0].due_at - time.time(), 1) if self._heap else None,
+            "fired": self.fired,
+            "failed": self.failed,
+            "calls": self.calls,
+        }
+
+
+deletions = DeletionScheduler()
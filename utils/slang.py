@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import time
+
+from config import SLANG_MATCHER_CACHE_SIZE
+from utils.cache import cache
+from utils.helpers import load_slang_words, read_slang_words, _find_slang_file
+from utils.slang_matcher import SlangMatcher
+
+logger = logging.getLogger(__name__)
+
+SLANG_WORDS = frozenset(load_slang_words())
+SLANG_MATCHER = SlangMatcher(SLANG_WORDS)
+
+# bumped whenever the global list changes, so every per-chat matcher goes stale with it
+_global_version = 0
+
+# chat_id -> ((chat_version, global_version), matcher); LRU so quiet chats fall out
+_matchers = cache.register("slang_matchers", maxsize=SLANG_MATCHER_CACHE_SIZE, persist=False)
+_building = {}
+_reload_lock = asyncio.Lock()
+
+
+def chat_words(cfg) -> frozenset:
+    """Global list minus the chat's removals, plus its additions."""
+    return (SLANG_WORDS - frozenset(cfg.slang_removed)) | frozenset(cfg.slang_added)
+
+
+async def _build(chat_id: int, version: tuple, words: frozenset) -> SlangMatcher:
+    # the automaton build is pure Python and can take a while on big lists; keep it off the loop
+    matcher = await asyncio.to_thread(SlangMatcher, words)
+    _matchers.set(chat_id, (version, matcher))
+    return matcher
+
+
+async def get_chat_matcher(cfg) -> SlangMatcher:
+    """Compiled matcher for a chat's effective word list, built once per (chat, version)."""
+    if not cfg.slang_added and not cfg.slang_removed:
+        return SLANG_MATCHER
+    version = (cfg.slang_version, _global_version)
+    entry = _matchers.get(cfg.chat_id)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    key = (cfg.chat_id, version)
+    task = _building.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_build(cfg.chat_id, version, chat_words(cfg)))
+        _building[key] = task
+        task.add_done_callback(lambda _t, k=key: _building.pop(k, None))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error("slang matcher build failed for %s: %s", cfg.chat_id, e)
+        return SLANG_MATCHER
+
+
+def invalidate_chat_matcher(chat_id: int) -> None:
+    _matchers.invalidate(chat_id)
+
+
+def _file_mtime():
+    try:
+        return os.stat(_find_slang_file()).st_mtime
+    except OSError:
+        return None
+
+
+_loaded_mtime = _file_mtime()
+_SETTLE_SECONDS = 1.0
+
+
+def _load_and_build():
+    t0 = time.perf_counter()
+    # strict: a missing, unreadable or half-written file must not become an empty list
+    words = frozenset(read_slang_words(_find_slang_file()))
+    if not words:
+        raise ValueError("slang list is empty")
+    t1 = time.perf_counter()
+    matcher = SlangMatcher(words)
+    t2 = time.perf_counter()
+    return words, matcher, (t1 - t0) * 1000, (t2 - t1) * 1000
+
+
+async def reload_slang_words() -> dict:
+    """Re-read slang_words.txt, build the new matcher in a worker thread and swap it in.
+
+    Raises without touching the current list if the file cannot be read or is empty.
+    """
+    global SLANG_WORDS, SLANG_MATCHER, _global_version, _loaded_mtime
+    async with _reload_lock:
+        mtime = _file_mtime()
+        try:
+            words, matcher, load_ms, build_ms = await asyncio.to_thread(_load_and_build)
+        except Exception as e:
+            # keep serving the current list; the watcher retries once the file changes again
+            _loaded_mtime = mtime
+            logger.error("slang reload failed, keeping %d current words: %s", len(SLANG_WORDS), e)
+            raise
+        old = SLANG_WORDS
+        # plain assignments with no await in between: handlers see either the old or the new list
+        SLANG_WORDS, SLANG_MATCHER = words, matcher
+        _global_version += 1
+        _loaded_mtime = mtime
+        _matchers.clear()
+        stats = {
+            "words": len(matcher),
+            "states": matcher.states,
+            "added": len(words - old),
+            "removed": len(old - words),
+            "load_ms": round(load_ms, 1),
+            "build_ms": round(build_ms, 1),
+            "version": _global_version,
+        }
+        logger.info("slang list reloaded: %s", stats)
+        return stats
+
+
+async def watch_slang_file(interval: float) -> None:
+    """Poll the slang file's mtime and reload when it changes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            mtime = _file_mtime()
+            if mtime is not None and mtime != _loaded_mtime:
+                # let a writer finish: only reload once the mtime has held still for a moment
+                await asyncio.sleep(_SETTLE_SECONDS)
+                if _file_mtime() == mtime:
+                    await reload_slang_words()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("slang file watch failed: %s", e)
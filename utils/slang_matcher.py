@@ -0,0 +1,271 @@
+import logging
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.normalize import normalize_text, collapse_repeats, run_lengths, is_word_char
+
+logger = logging.getLogger(__name__)
+
+
+class SlangMatcher:
+    """Aho-Corasick automaton over the normalized slang list: one pass per message, independent of list size.
+
+    Words and messages go through the same normalize_text() + repeat collapsing, so leetspeak,
+    homoglyphs, zero-width characters, spaced-out letters and stretched vowels all land on the
+    same key. A hit only counts on token boundaries, and a word that has doubled letters
+    ("tatta") only matches text whose runs are at least as long.
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "keys", "_variants", "words", "boundaries")
+
+    def __init__(self, words: Iterable[str], boundaries: bool = True):
+        self.boundaries = boundaries
+        variants: Dict[str, List[Tuple[str, Optional[tuple]]]] = {}
+        kept = set()
+        for word in words:
+            norm = normalize_text(word).strip()
+            if not any(ch.isalnum() for ch in norm):
+                continue
+            key = collapse_repeats(norm)
+            runs = run_lengths(norm)
+            profile = tuple(runs) if any(r > 1 for r in runs) else None
+            variants.setdefault(key, []).append((word, profile))
+            kept.add(word)
+        # plain entries first so they win over stricter doubled-letter variants of the same key
+        for key in variants:
+            variants[key].sort(key=lambda v: v[1] is not None)
+        self.words: Tuple[str, ...] = tuple(sorted(kept))
+        self.keys: Tuple[str, ...] = tuple(sorted(variants))
+        self._variants = variants
+
+        goto = [{}]
+        out: List[tuple] = [()]
+        for idx, key in enumerate(self.keys):
+            state = 0
+            for ch in key:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (idx,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Raw automaton pass over already-normalized text: (start, end, key), end exclusive."""
+        goto, fail, out, keys = self._goto, self._fail, self._out, self.keys
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for idx in out[state]:
+                    key = keys[idx]
+                    yield i + 1 - len(key), i + 1, key
+
+    def scan(self, text: str) -> List[Tuple[int, int, str]]:
+        """(start, end, word) for every accepted hit; spans index the collapsed, normalized text."""
+        norm = normalize_text(text)
+        flat = collapse_repeats(norm)
+        runs = None
+        hits = []
+        last = len(flat)
+        for start, end, key in self.finditer(flat):
+            if self.boundaries:
+                if start > 0 and is_word_char(flat[start - 1]) and is_word_char(flat[start]):
+                    continue
+                if end < last and is_word_char(flat[end]) and is_word_char(flat[end - 1]):
+                    continue
+            for word, profile in self._variants[key]:
+                if profile is not None:
+                    if runs is None:
+                        runs = run_lengths(norm)
+                    if any(runs[start + i] < need for i, need in enumerate(profile)):
+                        continue
+                hits.append((start, end, word))
+                break
+        return hits
+
+    def find(self, text: str) -> List[str]:
+        """Distinct matched words in order of first appearance."""
+        seen = {}
+        for _, _, word in self.scan(text):
+            seen.setdefault(word, None)
+        return list(seen)
+
+
+_BENCH_CLEAN = [
+    "good morning everyone, kal meeting kitne baje hai?",
+    "bhai ye video dekho, mast hai",
+    "the classic assassin movie was great",
+    "mera naam rahul hai aur main delhi se hoon",
+    "please share the notes of chapter 5 before 7pm",
+    "tata motors ke shares upar gaye aaj",
+    "kya scene hai guys, party kab hai?",
+    "I scored 100 in maths and 98 in science",
+    "aaj mausam bahut accha hai",
+    "this assignment is due on monday at 10",
+]
+
+# Hand-written and never fed back into the matcher or _obfuscate(): obfuscations people
+# actually type, and innocent words that contain or resemble listed ones. Numbers on the
+# generated corpus alone only show the matcher undoes the obfuscations it was built around.
+_HELD_OUT_ABUSIVE = [
+    "what the f u c k is this",
+    "F U C K you bro",
+    "sh1t happens yaar",
+    "you are a b!tch",
+    "tu ch*tiya hai kya",
+    "bhen-chod kahan tha",
+    "c.u.n.t",
+    "mad@rchod mat bol",
+    "g4ndu ho tum",
+    "shiiiiit man",
+    "рorn link bhejo",
+    "fuuuuck off",
+    "d1ck move bro",
+    "s3x chat karein?",
+    "wh0re",
+    "b@stard",
+    "b s d k",
+    "t4tti insaan",
+    "p_u_s_s_y",
+    "ye kya cr@p hai",
+    "f**k off",
+    "phuck this",
+]
+
+_HELD_OUT_BENIGN = [
+    "class starts at 9 tomorrow",
+    "Scunthorpe United won again",
+    "I grew up in Essex and Sussex",
+    "assassin's creed is on sale",
+    "cocktail party at the cockpit bar",
+    "passing the assessment was hard",
+    "therapist appointment at 5",
+    "the analysis report is ready",
+    "shiitake mushrooms are tasty",
+    "McDonald's ke burger",
+    "bass guitar lessons",
+    "title of the chapter",
+    "he is a documented analyst",
+    "section b c ke bacche aa jao",
+    "damnation is a word in the book",
+    "the crappie fish is common here",
+    "hancock is a good movie",
+    "matlab kuch bhi",
+    "button dabao",
+    "hello everyone",
+]
+
+
+def _obfuscate(word: str, rnd) -> str:
+    leet = {"a": "4", "e": "3", "i": "1", "o": "0", "s": "$", "t": "7"}
+    homoglyph = {"a": "\u0430", "e": "\u0435", "o": "\u043e", "c": "\u0441", "p": "\u0440", "x": "\u0445"}
+    style = rnd.randrange(6)
+    if style == 0:
+        return "".join(leet.get(ch, ch) for ch in word)
+    if style == 1:
+        return "\u200b".join(word)
+    if style == 2 and " " not in word:
+        return ".".join(word)
+    if style == 3:
+        return "".join(ch * rnd.randint(2, 4) if ch in "aeiou" else ch for ch in word)
+    if style == 4:
+        return "".join(homoglyph.get(ch, ch) for ch in word)
+    return word.upper()
+
+
+def benchmark(words, rounds: int = 20, seed: int = 7) -> dict:
+    """Precision/recall and per-message cost against the old substring scan.
+
+    Scored separately on a corpus generated from `words` with _obfuscate() and on the
+    hand-written held-out samples; only the held-out figures say much about real traffic.
+    """
+    import random
+    import time
+
+    rnd = random.Random(seed)
+    matcher_words = sorted(words)
+    corpus = [(text, False) for text in _BENCH_CLEAN]
+    for word in rnd.sample(matcher_words, min(200, len(matcher_words))):
+        clean = rnd.choice(_BENCH_CLEAN)
+        corpus.append((f"{clean} {_obfuscate(word, rnd)} yaar", True))
+    held_out = [(text, True) for text in _HELD_OUT_ABUSIVE] + [(text, False) for text in _HELD_OUT_BENIGN]
+
+    t0 = time.perf_counter()
+    matcher = SlangMatcher(matcher_words)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    def _substring(text):
+        low = text.lower()
+        return [w for w in matcher_words if w in low]
+
+    def _score(fn, messages):
+        tp = fp = missed = 0
+        for text, label in messages:
+            hit = bool(fn(text))
+            tp += hit and label
+            fp += hit and not label
+            missed += label and not hit
+        return {
+            "precision": round(tp / (tp + fp), 3) if tp + fp else 0.0,
+            "recall": round(tp / (tp + missed), 3) if tp + missed else 0.0,
+        }
+
+    report = {
+        "words": len(matcher),
+        "states": matcher.states,
+        "build_ms": round(build_ms, 1),
+        "messages": len(corpus),
+        "held_out_messages": len(held_out),
+    }
+    for name, fn in (("substring", _substring), ("automaton", matcher.find)):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for text, _ in corpus:
+                fn(text)
+        per_msg_us = (time.perf_counter() - t0) / (rounds * len(corpus)) * 1e6
+        report[name] = {
+            "generated": _score(fn, corpus),
+            "held_out": _score(fn, held_out),
+            "held_out_false_positives": [text for text, label in held_out if not label and fn(text)],
+            "held_out_missed": [text for text, label in held_out if label and not fn(text)],
+            "us_per_msg": round(per_msg_us, 1),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import os
+    import json
+
+    path = os.path.join(os.path.dirname(__file__), "slang_words.txt")
+    with open(path, "r", encoding="utf-8") as f:
+        entries = {line.strip().lower() for line in f if line.strip() and not line.startswith("#")}
+    print(json.dumps(benchmark(entries), indent=2))
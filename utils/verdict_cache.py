@@ -0,0 +1,152 @@
+import asyncio
+import io
+import logging
+from typing import Optional, Tuple
+
+from config import NSFW_HASH_DISTANCE, NSFW_VERDICT_CACHE_SIZE, NSFW_VERDICT_TTL
+from utils.cache import cache
+from utils.database import Database
+from utils.lazy import lazy_import
+
+Image = lazy_import("PIL.Image")
+
+logger = logging.getLogger(__name__)
+
+db = Database()
+
+# Multi-index hashing: the 64-bit hash is split into MAX_DISTANCE + 1 bands (13 bits each at the
+# default distance of 4). Two hashes within MAX_DISTANCE bits must agree on at least one whole
+# band (pigeonhole), so a multikey index on the bands finds every near-duplicate, and bands that
+# wide keep each lookup to a handful of candidates instead of a slice of the collection.
+MAX_DISTANCE = min(max(0, NSFW_HASH_DISTANCE), 7)
+_BANDS = MAX_DISTANCE + 1
+_WIDTHS = [64 // _BANDS + (1 if i < 64 % _BANDS else 0) for i in range(_BANDS)]
+
+# ("f", file_unique_id) or ("h", hash) -> (label, score)
+_verdicts = cache.register("media_verdicts", maxsize=NSFW_VERDICT_CACHE_SIZE, ttl=NSFW_VERDICT_TTL, persist=False)
+
+
+def dhash(image) -> int:
+    """64-bit difference hash of a path or encoded bytes: survives re-encoding, resizing and small crops."""
+    if isinstance(image, (bytes, bytearray)):
+        image = io.BytesIO(image)
+    with Image.open(image) as img:
+        small = img.convert("L").resize((9, 8), Image.LANCZOS)
+        px = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = px[row * 9 + col]
+            right = px[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _bands(h: int) -> list:
+    """Band keys for `h`; the layout is encoded in each key so a changed distance never mixes layouts."""
+    if _BANDS < 2:
+        # distance 0 is an exact match, served by the phash lookup alone
+        return []
+    keys = []
+    shift = 0
+    for i, width in enumerate(_WIDTHS):
+        value = (h >> shift) & ((1 << width) - 1)
+        keys.append((_BANDS << 40) | (i << 32) | value)
+        shift += width
+    return keys
+
+
+def _to_db(h: int) -> int:
+    # Mongo integers are signed 64-bit
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def _from_db(h: int) -> int:
+    return h + (1 << 64) if h < 0 else h
+
+
+async def image_hash(image) -> Optional[int]:
+    try:
+        return await asyncio.to_thread(dhash, image)
+    except Exception as e:
+        logger.debug("image hashing failed: %s", e)
+        return None
+
+
+async def lookup_file(file_unique_id: str) -> Optional[Tuple[str, float]]:
+    """Verdict for an exact Telegram file, answerable before downloading anything."""
+    if not file_unique_id:
+        return None
+    hit = _verdicts.get(("f", file_unique_id))
+    if hit is not None:
+        return hit
+    try:
+        doc = await db.get_media_verdict(file_unique_id)
+    except Exception as e:
+        logger.warning("verdict lookup failed for %s: %s", file_unique_id, e)
+        return None
+    if not doc:
+        return None
+    hit = (doc.get("label", "Unknown"), float(doc.get("score", 0.0)))
+    _verdicts.set(("f", file_unique_id), hit)
+    return hit
+
+
+async def lookup_hash(h: Optional[int]) -> Optional[Tuple[str, float]]:
+    """Verdict for the closest stored image within MAX_DISTANCE bits."""
+    if h is None:
+        return None
+    hit = _verdicts.get(("h", h))
+    if hit is not None:
+        return hit
+    try:
+        # the same image re-sent is by far the common case and needs no band scan
+        exact = await db.find_media_verdict_by_hash(_to_db(h))
+        if exact is not None:
+            candidates = [exact]
+        else:
+            bands = _bands(h)
+            candidates = await db.find_media_verdicts(bands) if bands else []
+    except Exception as e:
+        logger.warning("near-duplicate lookup failed: %s", e)
+        return None
+    best = None
+    best_dist = MAX_DISTANCE + 1
+    for doc in candidates:
+        stored = doc.get("phash")
+        if stored is None:
+            continue
+        dist = hamming(h, _from_db(stored))
+        if dist < best_dist:
+            best, best_dist = doc, dist
+    if best is None:
+        return None
+    hit = (best.get("label", "Unknown"), float(best.get("score", 0.0)))
+    _verdicts.set(("h", h), hit)
+    return hit
+
+
+async def remember(file_unique_id: Optional[str], h: Optional[int], label: str, score: float,
+                   persist: bool = True) -> None:
+    """Cache a verdict; with `persist` it is also saved to Mongo, otherwise it lives only in this process."""
+    hit = (label, float(score))
+    if file_unique_id:
+        _verdicts.set(("f", file_unique_id), hit)
+    if h is not None:
+        _verdicts.set(("h", h), hit)
+    if not file_unique_id or not persist:
+        return
+    try:
+        await db.save_media_verdict(
+            file_unique_id,
+            _to_db(h) if h is not None else None,
+            _bands(h) if h is not None else None,
+            label,
+            float(score),
+        )
+    except Exception as e:
+        logger.warning("verdict save failed for %s: %s", file_unique_id, e)
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """Fixed set of warm worker processes for CPU-bound model calls.
+
+    Every worker runs `initializer(*initargs)` once (model load) and then serves calls.
+    A crashed worker breaks the underlying executor; the pool replaces it and retries the call
+    once. A periodic health check pings the workers and restarts the pool if they hang.
+    """
+
+    def __init__(self, workers: int, initializer: Callable, initargs: tuple = (),
+                 ping: Optional[Callable] = None, name: str = "pool", health_interval: float = 60):
+        self.workers = max(1, int(workers))
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.ping = ping
+        self.name = name
+        self.health_interval = health_interval
+        self.restarts = 0
+        self.healthy = 0
+        self.last_check = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warmup = []
+        self._lock = asyncio.Lock()
+        self._monitor: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Spawn the workers and kick off their model load without waiting for it."""
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer,
+            initargs=self.initargs,
+        )
+        if self.ping is not None:
+            # one call per worker forces the executor to spawn all of them now, not on first use
+            self._warmup = [self._executor.submit(self.ping) for _ in range(self.workers)]
+        logger.info("%s: started %d worker(s)", self.name, self.workers)
+
+    def _kill(self, executor: ProcessPoolExecutor) -> None:
+        # shutdown() alone waits on a hung worker forever
+        for proc in list(getattr(executor, "_processes", {}).values()):
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _replace(self, broken: Optional[ProcessPoolExecutor], reason: str) -> None:
+        async with self._lock:
+            if self._executor is not broken:
+                return
+            logger.warning("%s: restarting workers (%s)", self.name, reason)
+            if broken is not None:
+                self._kill(broken)
+            self.restarts += 1
+            self.start()
+
+    def restart(self, initargs: Optional[tuple] = None) -> None:
+        """Respawn every worker, e.g. to load the model with different options."""
+        if initargs is not None:
+            self.initargs = tuple(initargs)
+        old = self._executor
+        self.start()
+        if old is not None:
+            self._kill(old)
+
+    async def run(self, fn: Callable, *args):
+        if self._executor is None:
+            self.start()
+        if self._monitor is None and self.ping is not None:
+            self._monitor = asyncio.get_running_loop().create_task(self._watch())
+        loop = asyncio.get_running_loop()
+        for attempt in (0, 1):
+            executor = self._executor
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                await self._replace(executor, "worker crashed")
+                if attempt:
+                    raise
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> int:
+        """Wait for the warm-up pings sent by start(); returns how many workers loaded the model."""
+        if not self._warmup:
+            return 0
+        done, _ = await asyncio.wait([asyncio.wrap_future(f) for f in self._warmup], timeout=timeout)
+        replies = [f.result() for f in done if not f.cancelled() and f.exception() is None]
+        self.healthy = len({pid for pid, ready in replies if ready})
+        self.last_check = time.time()
+        return self.healthy
+
+    async def health_check(self, timeout: float = 30) -> int:
+        """Ping every worker; returns how many answered with a loaded model."""
+        executor = self._executor
+        if executor is None or self.ping is None:
+            return 0
+        if not all(f.done() for f in self._warmup):
+            # still loading the model; pings would just queue behind the initializer
+            return self.healthy
+        loop = asyncio.get_running_loop()
+        calls = [loop.run_in_executor(executor, self.ping) for _ in range(self.workers)]
+        try:
+            replies = await asyncio.wait_for(asyncio.gather(*calls), timeout)
+        except asyncio.TimeoutError:
+            await self._replace(executor, "health check timed out")
+            return 0
+        except BrokenProcessPool:
+            await self._replace(executor, "worker crashed")
+            return 0
+        self.healthy = len({pid for pid, ready in replies if ready})
+        self.last_check = time.time()
+        return self.healthy
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.health_check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("%s: health check failed: %s", self.name, e)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "healthy": self.healthy,
+            "restarts": self.restarts,
+            "last_check": self.last_check,
+        }
+
+    def shutdown(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None